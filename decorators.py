@@ -1,10 +1,45 @@
 from functools import wraps
-from django.shortcuts import get_object_or_404, redirect
+from django.http import Http404
+from django.shortcuts import redirect
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.core.exceptions import PermissionDenied
 
-from migrationsdb.models import User
+# Grupos con acceso de gestión a todas las bibliotecas
+_STAFF_ROLES = frozenset({'Administradores', 'Bibliotecarios'})
+
+
+def user_group_names(user):
+    """
+    Devuelve los nombres de grupo del usuario, cacheados en la instancia
+    durante el ciclo de la petición. Compartido por decoradores, vistas y plantillas.
+    """
+    if not hasattr(user, '_cached_group_names'):
+        user._cached_group_names = frozenset(user.groups.values_list('name', flat=True))
+    return user._cached_group_names
+
+
+def _perm_set(user):
+    """
+    Devuelve el conjunto de permisos del usuario ('app_label.codename'),
+    cacheado en la instancia durante el ciclo de la petición.
+    """
+    if not hasattr(user, '_cached_perms'):
+        user._cached_perms = user.get_all_permissions()
+    return user._cached_perms
+
+
+def _has_role_or_perm(user, perm, roles=_STAFF_ROLES):
+    """
+    Verifica si el usuario tiene el permiso indicado o pertenece a alguno de los grupos.
+    :param user: usuario autenticado de Django
+    :param perm: permiso en formato 'app_label.codename'
+    :param roles: frozenset con los nombres de grupo que conceden acceso
+    :return: True si tiene acceso
+    """
+    if user.is_active and user.is_superuser:
+        return True
+    return perm in _perm_set(user) or bool(user_group_names(user) & roles)
 
 
 def library_access_required(view_func):
@@ -17,19 +52,20 @@ def library_access_required(view_func):
     @wraps(view_func)
     @login_required
     def wrapper(request, user_id, *args, **kwargs):
-        # Obtener el usuario de la biblioteca
-        library_user = get_object_or_404(User, id=user_id)
-
         # Verificar si el usuario tiene permisos globales
-        if (request.user.has_perm('migrationsdb.view_all_libraries') or
-                request.user.groups.filter(name__in=['Administradores', 'Bibliotecarios']).exists()):
+        if _has_role_or_perm(request.user, 'migrationsdb.view_all_libraries'):
             return view_func(request, user_id, *args, **kwargs)
 
-        # Verificar si es su propia biblioteca
-        if hasattr(request.user, 'user') and request.user.user == library_user:
+        # Importación diferida: solo se carga el modelo si hace falta
+        from migrationsdb.models import User
+
+        # Verificar si es su propia biblioteca comparando IDs, sin cargar la fila
+        if User.objects.filter(id=user_id, auth_user_id=request.user.pk).exists():
             return view_func(request, user_id, *args, **kwargs)
 
-        # Si no tiene permisos
+        # 404 si la biblioteca no existe (EXISTS, sin leer la fila); si existe, no tiene permisos
+        if not User.objects.filter(id=user_id).exists():
+            raise Http404('La biblioteca solicitada no existe.')
         messages.error(request, 'No tienes permisos para acceder a esta biblioteca.')
         return redirect('home')
 
@@ -46,8 +82,7 @@ def library_management_required(view_func):
     @login_required
     def wrapper(request, user_id, *args, **kwargs):
         # Verificar permisos de gestión
-        if (request.user.has_perm('migrationsdb.manage_library') or
-                request.user.groups.filter(name__in=['Administradores', 'Bibliotecarios']).exists()):
+        if _has_role_or_perm(request.user, 'migrationsdb.manage_library'):
             return view_func(request, user_id, *args, **kwargs)
 
         messages.error(request, 'No tienes permisos para gestionar bibliotecas.')
@@ -65,8 +100,7 @@ def reports_required(view_func):
     @wraps(view_func)
     @login_required
     def wrapper(request, *args, **kwargs):
-        if (request.user.has_perm('migrationsdb.generate_reports') or
-                request.user.groups.filter(name__in=['Administradores', 'Bibliotecarios']).exists()):
+        if _has_role_or_perm(request.user, 'migrationsdb.generate_reports'):
             return view_func(request, *args, **kwargs)
 
         messages.error(request, 'No tienes permisos para generar reportes.')
@@ -84,8 +118,7 @@ def import_books_required(view_func):
     @wraps(view_func)
     @login_required
     def wrapper(request, *args, **kwargs):
-        if (request.user.has_perm('migrationsdb.import_books') or
-                request.user.groups.filter(name__in=['Administradores', 'Bibliotecarios']).exists()):
+        if _has_role_or_perm(request.user, 'migrationsdb.import_books'):
             return view_func(request, *args, **kwargs)
 
         messages.error(request, 'No tienes permisos para importar libros.')
@@ -1,4 +1,5 @@
 from django.contrib import admin
+from django.db.models import Count
 from django.utils.translation import gettext_lazy as _
 from migrationsdb.models import User, Author, Genre, Book
 
@@ -26,15 +27,22 @@ class UserAdmin(admin.ModelAdmin):
     search_fields = ['first_name', 'last_name', 'email']
     readonly_fields = ['created_at']
     ordering = ['last_name', 'first_name']
+    show_full_result_count = False
+    list_per_page = 50
+    list_max_show_all = 200
 
     def has_auth_user(self, obj):
         return obj.auth_user is not None
     has_auth_user.boolean = True
     has_auth_user.short_description = 'Puede acceder'
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(_books_count=Count('books'))
+
     def books_count(self, obj):
-        return obj.books.count()
+        return obj._books_count
     books_count.short_description = 'Libros'
+    books_count.admin_order_field = '_books_count'
 
 @admin.register(Author)
 class AuthorAdmin(admin.ModelAdmin):
@@ -43,10 +51,17 @@ class AuthorAdmin(admin.ModelAdmin):
     search_fields = ['first_name', 'last_name', 'nationality']
     readonly_fields = ['created_at']
     ordering = ['last_name', 'first_name']
+    show_full_result_count = False
+    list_per_page = 50
+    list_max_show_all = 200
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(_books_count=Count('books'))
 
     def books_count(self, obj):
-        return obj.books.count()
+        return obj._books_count
     books_count.short_description = 'Libros'
+    books_count.admin_order_field = '_books_count'
 
 @admin.register(Genre)
 class GenreAdmin(admin.ModelAdmin):
@@ -55,10 +70,17 @@ class GenreAdmin(admin.ModelAdmin):
     search_fields = ['name']
     readonly_fields = ['created_at']
     ordering = ['name']
+    show_full_result_count = False
+    list_per_page = 50
+    list_max_show_all = 200
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(_books_count=Count('book'))
 
     def books_count(self, obj):
-        return obj.books.count()
+        return obj._books_count
     books_count.short_description = 'Libros'
+    books_count.admin_order_field = '_books_count'
 
 @admin.register(Book)
 class BookAdmin(admin.ModelAdmin):
@@ -66,5 +88,10 @@ class BookAdmin(admin.ModelAdmin):
     list_filter = ['published_date', 'created_at', 'author', 'genres', 'owner']
     search_fields = ['title', 'author__first_name', 'author__last_name', 'isbn']
     readonly_fields = ['created_at']
-    filter_horizontal = ['genres']
-    ordering = ['title']
\ No newline at end of file
+    list_select_related = ['author', 'owner']
+    autocomplete_fields = ['author', 'owner', 'genres']
+    ordering = ['title']
+    show_full_result_count = False
+    list_per_page = 50
+    list_max_show_all = 200
+    sortable_by = ['title', 'published_date']
\ No newline at end of file
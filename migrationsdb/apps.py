@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class MigrationsdbConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'migrationsdb'
+
+    def ready(self):
+        # Registrar las señales que invalidan la caché de PDF
+        from migrationsdb import signals  # noqa: F401
@@ -0,0 +1,41 @@
+import uuid
+
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+PERMS_CACHE_TTL = 300  # segundos
+_PERMS_CACHE_VERSION_KEY = 'auth:perms:version'
+
+
+def invalidate_perms_cache():
+    """
+    Invalida los permisos cacheados de todos los usuarios cambiando la versión incluida
+    en sus claves. Se llama desde las señales de grupos y permisos y desde
+    setup_initial_groups, que escribe directamente en la tabla de permisos de grupo.
+    """
+    cache.set(_PERMS_CACHE_VERSION_KEY, uuid.uuid4().hex, None)
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend que guarda en caché entre peticiones el conjunto de permisos de cada
+    usuario, evitando las consultas de permisos de usuario y de grupo en cada petición.
+    La clave incluye is_superuser, de modo que cambiar ese indicador no requiere invalidar.
+    Requiere una caché compartida entre procesos (settings.SHARED_CACHE): con LocMemCache
+    una revocación solo se vería en el proceso que la hizo.
+    """
+
+    def get_all_permissions(self, user_obj, obj=None):
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return set()
+
+        # Caché de la petición (la misma que usa ModelBackend) y, si no existe, caché compartida
+        if not hasattr(user_obj, '_perm_cache'):
+            version = cache.get_or_set(_PERMS_CACHE_VERSION_KEY, lambda: uuid.uuid4().hex, None)
+            key = f'auth:perms:{version}:{user_obj.pk}:{int(user_obj.is_superuser)}'
+            perms = cache.get(key)
+            if perms is None:
+                perms = super().get_all_permissions(user_obj)
+                cache.set(key, perms, PERMS_CACHE_TTL)
+            user_obj._perm_cache = perms
+        return user_obj._perm_cache
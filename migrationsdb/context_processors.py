@@ -0,0 +1,18 @@
+from decorators import user_group_names
+
+
+def user_groups(request):
+    """
+    Expone en las plantillas los nombres de grupo del usuario autenticado.
+    Se evalúa de forma diferida: la consulta solo se hace si la plantilla los usa,
+    y reutiliza la caché de la petición compartida con los decoradores.
+    :param request: El objeto HttpRequest de Django.
+    :return: dict con current_user_groups (callable que devuelve la lista ordenada)
+    """
+    def current_user_groups():
+        user = getattr(request, 'user', None)
+        if user is None or not user.is_authenticated:
+            return []
+        return sorted(user_group_names(user))
+
+    return {'current_user_groups': current_user_groups}
@@ -16,34 +16,42 @@ class AuthorForm(forms.ModelForm):
             'birth_date': 'Fecha de Nacimiento',
             'nationality': 'Nacionalidad',}
         widgets = {
-            'birth_date': forms.DateInput(attrs={'type': 'date'}),
+            'first_name': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Ingrese nombre'}),
+            'last_name': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Ingrese apellido'}),
+            'birth_date': forms.DateInput(attrs={
+                'type': 'date', 'class': 'form-control', 'placeholder': 'Ingrese fecha de nacimiento'
+            }),
+            'nationality': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Ingrese nacionalidad'}),
         }
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        for field_name, field in self.fields.items():
-            field.widget.attrs['class'] = 'form-control'
-            if not field.widget.attrs.get('placeholder'):
-                field.widget.attrs['placeholder'] = f'Ingrese {field.label.lower()}'
-
     def clean(self):
         cleaned_data = super().clean()
-        first_name = cleaned_data.get('first_name')
-        last_name = cleaned_data.get('last_name')
+        first_name = (cleaned_data.get('first_name') or '').strip()
+        last_name = (cleaned_data.get('last_name') or '').strip()
         birth_date = cleaned_data.get('birth_date')
         # Validar que el nombre y apellido no estén vacíos
-        if first_name and len(first_name.strip()) < 2:
+        if first_name and len(first_name) < 2:
             raise forms.ValidationError('El nombre debe tener al menos 2 caracteres.')
 
-        if last_name and len(last_name.strip()) < 2:
+        if last_name and len(last_name) < 2:
             raise forms.ValidationError('El apellido debe tener al menos 2 caracteres.')
 
+        today = date.today()
+
         # Validar que la fecha de nacimiento no sea futura
-        if birth_date and birth_date > date.today():
+        if birth_date and birth_date > today:
             raise forms.ValidationError('La fecha de nacimiento no puede ser futura.')
 
         # Validar que el autor no sea menor de edad (opcional)
-        if birth_date and (date.today() - birth_date).days < 6570:  # ~18 años
-            raise forms.ValidationError('El autor debe ser mayor de edad.')
+        if birth_date:
+            age = today.year - birth_date.year - ((today.month, today.day) < (birth_date.month, birth_date.day))
+            if age < 18:
+                raise forms.ValidationError('El autor debe ser mayor de edad.')
+
+        # Actualizar datos limpios
+        if first_name:
+            cleaned_data['first_name'] = first_name
+        if last_name:
+            cleaned_data['last_name'] = last_name
 
         return cleaned_data
@@ -19,32 +19,26 @@ class BookForm(forms.ModelForm):
             'genres': 'Géneros',
         }
         widgets = {
-            'published_date': forms.DateInput(attrs={'type': 'date'}),
-            'genres': forms.CheckboxSelectMultiple(),
+            'title': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Ingrese título'}),
+            'author': forms.Select(attrs={'class': 'form-select'}),
+            'owner': forms.Select(attrs={'class': 'form-select'}),
+            'published_date': forms.DateInput(attrs={
+                'type': 'date', 'class': 'form-control', 'placeholder': 'Ingrese fecha de publicación'
+            }),
+            'isbn': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Ingrese isbn'}),
+            'pages': forms.NumberInput(attrs={'class': 'form-control', 'placeholder': 'Ingrese número de páginas'}),
+            'genres': forms.CheckboxSelectMultiple(attrs={'class': 'form-check-input'}),
         }
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        for field_name, field in self.fields.items():
-            if isinstance(field.widget, forms.CheckboxSelectMultiple):
-                field.widget.attrs['class'] = 'form-check-input'
-            elif isinstance(field.widget, forms.Select):
-                field.widget.attrs['class'] = 'form-select'
-            else:
-                field.widget.attrs['class'] = 'form-control'
-
-            if not field.widget.attrs.get('placeholder') and field_name not in ['author', 'genres']:
-                field.widget.attrs['placeholder'] = f'Ingrese {field.label.lower()}'
-
     def clean(self):
         cleaned_data = super().clean()
-        title = cleaned_data.get('title')
+        title = (cleaned_data.get('title') or '').strip()
         published_date = cleaned_data.get('published_date')
         isbn = cleaned_data.get('isbn')
         pages = cleaned_data.get('pages')
 
         # Validar que el título no esté vacío y tenga al menos 2 caracteres
-        if title and len(title.strip()) < 2:
+        if title and len(title) < 2:
             raise forms.ValidationError('El título debe tener al menos 2 caracteres.')
 
         # Validar que la fecha de publicación no sea futura
@@ -59,5 +53,9 @@ class BookForm(forms.ModelForm):
         if pages is not None and pages <= 0:
             raise forms.ValidationError('El número de páginas debe ser un valor positivo.')
 
+        # Actualizar datos limpios
+        if title:
+            cleaned_data['title'] = title
+
         return cleaned_data
 
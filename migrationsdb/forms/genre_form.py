@@ -14,24 +14,22 @@ class GenreForm(forms.ModelForm):
             'description': 'Descripción',
         }
         widgets = {
-            'name': forms.TextInput(attrs={'class': 'form-control'}),
-            'description': forms.Textarea(attrs={'class': 'form-control', 'rows': 3}),
+            'name': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Ingrese nombre del género'}),
+            'description': forms.Textarea(attrs={
+                'class': 'form-control', 'rows': 3, 'placeholder': 'Ingrese descripción'
+            }),
         }
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        for field_name, field in self.fields.items():
-            field.widget.attrs['class'] = 'form-control'
-            if not field.widget.attrs.get('placeholder'):
-                field.widget.attrs['placeholder'] = f'Ingrese {field.label.lower()}'
-
     def clean(self):
         cleaned_data = super().clean()
-        name = cleaned_data.get('name')
+        name = (cleaned_data.get('name') or '').strip()
 
         # Validar que el nombre no esté vacío y tenga al menos 2 caracteres
-        if name and len(name.strip()) < 2:
+        if name and len(name) < 2:
             raise forms.ValidationError('El nombre del género debe tener al menos 2 caracteres.')
 
+        # Actualizar datos limpios
+        if name:
+            cleaned_data['name'] = name
 
         return cleaned_data
\ No newline at end of file
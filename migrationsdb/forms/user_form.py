@@ -1,7 +1,12 @@
+import re
+
 from django import forms
 from django.contrib.auth.models import User as AuthUser
 from migrationsdb.models import User
 
+# Letras, números, guiones y guiones bajos, con al menos un carácter alfanumérico
+_USERNAME_RE = re.compile(r'^[\w-]*[^\W_][\w-]*\Z')
+
 
 class UserForm(forms.ModelForm):
     """
@@ -11,24 +16,40 @@ class UserForm(forms.ModelForm):
 
     # Campos adicionales para autenticación (opcionales)
     create_auth_user = forms.BooleanField(
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'}),
         required=False,
         label='Crear usuario de acceso al sistema',
         help_text='Permite que este usuario pueda iniciar sesión'
     )
     username = forms.CharField(
+        widget=forms.TextInput(attrs={
+            'class': 'form-control',
+            'placeholder': 'usuario123',
+            'autocomplete': 'username',
+            'minlength': '3'
+        }),
         max_length=150,
         required=False,
         label='Nombre de usuario',
         help_text='Nombre para iniciar sesión (solo si se marca la opción anterior)'
     )
     password = forms.CharField(
-        widget=forms.PasswordInput(),
+        widget=forms.PasswordInput(attrs={
+            'class': 'form-control',
+            'placeholder': 'Mínimo 6 caracteres',
+            'autocomplete': 'new-password',
+            'minlength': '6'
+        }),
         required=False,
         label='Contraseña',
         help_text='Contraseña para iniciar sesión (solo si se marca la opción anterior)'
     )
     password_confirm = forms.CharField(
-        widget=forms.PasswordInput(),
+        widget=forms.PasswordInput(attrs={
+            'class': 'form-control',
+            'placeholder': 'Confirmar contraseña',
+            'autocomplete': 'new-password'
+        }),
         required=False,
         label='Confirmar contraseña'
     )
@@ -43,66 +64,38 @@ class UserForm(forms.ModelForm):
             'email': 'Correo Electrónico',
         }
         widgets = {
-            'first_name': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Ingresa el primer nombre'}),
-            'last_name': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Ingresa el apellido'}),
-            'age': forms.NumberInput(attrs={'class': 'form-control', 'min': '0', 'max': '100'}),
-            'email': forms.EmailInput(attrs={'class': 'form-control', 'placeholder': 'correo@ejemplo.com'}),
+            'first_name': forms.TextInput(attrs={
+                'class': 'form-control',
+                'placeholder': 'Ej: Juan Carlos',
+                'autocomplete': 'given-name'
+            }),
+            'last_name': forms.TextInput(attrs={
+                'class': 'form-control',
+                'placeholder': 'Ej: García López',
+                'autocomplete': 'family-name'
+            }),
+            'age': forms.NumberInput(attrs={
+                'class': 'form-control',
+                'min': '0',
+                'max': '100',
+                'placeholder': 'Ej: 25'
+            }),
+            'email': forms.EmailInput(attrs={
+                'class': 'form-control',
+                'placeholder': 'ejemplo@correo.com',
+                'autocomplete': 'email'
+            }),
         }
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, taken_emails=None, **kwargs):
         """
-        Inicializa el formulario y configura widgets y atributos de Bootstrap.
-        También maneja la lógica de actualización vs creación de usuarios.
+        Inicializa el formulario. Los atributos de Bootstrap se declaran en los widgets;
+        aquí solo se maneja la lógica de actualización vs creación de usuarios.
+        :param taken_emails: conjunto opcional de emails ya registrados, obtenido con
+            prefetch_taken_emails() para validar muchos formularios con una sola consulta.
         """
         super().__init__(*args, **kwargs)
-
-        # Aplicar clases Bootstrap a todos los campos
-        for field_name, field in self.fields.items():
-            if isinstance(field.widget, forms.CheckboxInput):
-                field.widget.attrs.update({'class': 'form-check-input'})
-            else:
-                field.widget.attrs.update({'class': 'form-control'})
-
-        # Configuraciones específicas por campo
-        self.fields['first_name'].widget.attrs.update({
-            'placeholder': 'Ej: Juan Carlos',
-            'autocomplete': 'given-name'
-        })
-
-        self.fields['last_name'].widget.attrs.update({
-            'placeholder': 'Ej: García López',
-            'autocomplete': 'family-name'
-        })
-
-        self.fields['age'].widget.attrs.update({
-            'type': 'number',
-            'min': '0',
-            'max': '100',
-            'placeholder': 'Ej: 25'
-        })
-
-        self.fields['email'].widget.attrs.update({
-            'type': 'email',
-            'placeholder': 'ejemplo@correo.com',
-            'autocomplete': 'email'
-        })
-
-        self.fields['username'].widget.attrs.update({
-            'placeholder': 'usuario123',
-            'autocomplete': 'username',
-            'minlength': '3'
-        })
-
-        self.fields['password'].widget.attrs.update({
-            'placeholder': 'Mínimo 6 caracteres',
-            'autocomplete': 'new-password',
-            'minlength': '6'
-        })
-
-        self.fields['password_confirm'].widget.attrs.update({
-            'placeholder': 'Confirmar contraseña',
-            'autocomplete': 'new-password'
-        })
+        self.taken_emails = taken_emails
 
         # Si es actualización, prellenar datos de autenticación si existen
         if self.instance and self.instance.pk and self.instance.auth_user:
@@ -147,12 +140,6 @@ class UserForm(forms.ModelForm):
             elif age < 18:
                 self.add_error('age', 'El usuario debe ser mayor de edad (18 años o más).')
 
-        # Validar email único (solo si no es una actualización del mismo usuario)
-        if email:
-            existing_user = User.objects.filter(email=email).first()
-            if existing_user and existing_user != self.instance:
-                self.add_error('email', 'Ya existe un usuario con este correo electrónico.')
-
         # Validaciones de autenticación
         create_auth = cleaned_data.get('create_auth_user')
         username = cleaned_data.get('username', '').strip()
@@ -165,13 +152,11 @@ class UserForm(forms.ModelForm):
                 self.add_error('username', 'Se requiere nombre de usuario para crear acceso al sistema.')
             elif len(username) < 3:
                 self.add_error('username', 'El nombre de usuario debe tener al menos 3 caracteres.')
-            elif not username.replace('_', '').replace('-', '').isalnum():
+            elif not _USERNAME_RE.match(username):
                 self.add_error('username',
                                'El nombre de usuario solo puede contener letras, números, guiones y guiones bajos.')
-            elif AuthUser.objects.filter(username=username).exists():
-                # Verificar si no es una actualización del mismo usuario
-                if not (self.instance.pk and self.instance.auth_user and self.instance.auth_user.username == username):
-                    self.add_error('username', 'El nombre de usuario ya existe.')
+            elif self._is_username_taken(username):
+                self.add_error('username', 'El nombre de usuario ya existe.')
 
             # Validar contraseña requerida
             if not password:
@@ -190,6 +175,16 @@ class UserForm(forms.ModelForm):
             cleaned_data['password'] = ''
             cleaned_data['password_confirm'] = ''
 
+        # Validar email único al final, tras las validaciones en memoria.
+        # Si el email no cambió en una actualización, no se consulta la base de datos.
+        if email and email != self.instance.email:
+            if self.taken_emails is not None:
+                email_taken = email in self.taken_emails
+            else:
+                email_taken = User.objects.filter(email=email).exclude(pk=self.instance.pk or 0).exists()
+            if email_taken:
+                self.add_error('email', 'Ya existe un usuario con este correo electrónico.')
+
         # Actualizar datos limpios
         cleaned_data['first_name'] = first_name
         cleaned_data['last_name'] = last_name
@@ -197,6 +192,36 @@ class UserForm(forms.ModelForm):
 
         return cleaned_data
 
+    @classmethod
+    def prefetch_taken_emails(cls, emails):
+        """
+        Obtiene en una sola consulta cuáles de los emails ya están registrados.
+        Pensado para importaciones masivas: el resultado se pasa a cada formulario
+        con el argumento taken_emails.
+        :param emails: Iterable de emails a verificar.
+        :return: Conjunto con los emails que ya existen.
+        """
+        emails = {email.strip() for email in emails if email}
+        return set(User.objects.filter(email__in=emails).values_list('email', flat=True))
+
+    def _is_username_taken(self, username):
+        """
+        Verifica si el username ya pertenece a otro usuario de autenticación.
+        El resultado se cachea en el formulario para no repetir la consulta.
+        :param username: Nombre de usuario a verificar.
+        :return: True si otro usuario ya lo utiliza.
+        """
+        if not hasattr(self, '_username_taken'):
+            own_auth_user = self.instance.auth_user if self.instance.pk else None
+            if own_auth_user and own_auth_user.username == username:
+                # Actualización sin cambio de username: no hace falta consultar
+                self._username_taken = False
+            else:
+                # Excluir el usuario de autenticación propio en actualizaciones
+                own_pk = own_auth_user.pk if own_auth_user else 0
+                self._username_taken = AuthUser.objects.filter(username=username).exclude(pk=own_pk).exists()
+        return self._username_taken
+
     def save(self, commit=True):
         """
         Guarda el usuario y opcionalmente crea un usuario de autenticación asociado.
@@ -4,30 +4,38 @@ from django.contrib.auth.models import User, Group, Permission
 
 class Command(BaseCommand):
     """"
-    Asigna permisos o grupos a usuarios existentes
+    Asigna permisos o grupos a uno o varios usuarios existentes
     Uso:
-    python manage.py assign_permissions --username <username> [--group <groupname>] [--permission <app_label.codename>]
+    python manage.py assign_permissions --username <username> [<username> ...] [--group <groupname>] [--permission <app_label.codename>]
     Ejemplo:
     python manage.py assign_permissions --username admin --group Administradores
-    python manage.py assign_permissions --username user1 --permission migrationsdb.view_all_libraries
+    python manage.py assign_permissions --username user1 user2 --permission migrationsdb.view_all_libraries
     """
     help = 'Asignar permisos o grupos a usuarios'
 
     def add_arguments(self, parser):
-        parser.add_argument('--username', type=str, required=True)
+        parser.add_argument('--username', type=str, nargs='+', required=True)
         parser.add_argument('--group', type=str)
         parser.add_argument('--permission', type=str)
 
     def handle(self, *args, **options):
-        username = options['username']
+        usernames = options['username']
 
         try:
-            user = User.objects.get(username=username)
+            # Obtener todos los usuarios en una sola consulta
+            users = list(User.objects.filter(username__in=usernames))
+            missing = set(usernames) - {user.username for user in users}
+            for username in sorted(missing):
+                self.stdout.write(f'Error: el usuario {username} no existe')
+            if not users:
+                return
+
+            names = ', '.join(user.username for user in users)
 
             if options['group']:
                 group = Group.objects.get(name=options['group'])
-                user.groups.add(group)
-                self.stdout.write(f'✓ Usuario {username} agregado al grupo {group.name}')
+                group.user_set.add(*users)
+                self.stdout.write(f'✓ Usuario(s) {names} agregado(s) al grupo {group.name}')
 
             if options['permission']:
                 perm_parts = options['permission'].split('.')
@@ -37,8 +45,8 @@ class Command(BaseCommand):
                         content_type__app_label=app_label,
                         codename=codename
                     )
-                    user.user_permissions.add(permission)
-                    self.stdout.write(f'Permiso {permission.name} asignado a {username}')
+                    permission.user_set.add(*users)
+                    self.stdout.write(f'Permiso {permission.name} asignado a {names}')
 
         except Exception as e:
             self.stdout.write(f'Error: {str(e)}')
\ No newline at end of file
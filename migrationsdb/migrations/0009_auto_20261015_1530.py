@@ -0,0 +1,25 @@
+# Generated by Django 3.2.25 on 2026-10-15 15:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('migrationsdb', '0008_alter_user_options'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='author',
+            index=models.Index(fields=['last_name', 'first_name'], name='migrationsd_last_na_d13219_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['owner', '-created_at'], name='migrationsd_owner_i_8997bb_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['title'], name='migrationsd_title_f58e07_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-15 15:47
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('migrationsdb', '0009_auto_20261015_1530'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(django.db.models.functions.text.Lower('title'), name='book_title_lower_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.25 on 2026-10-15 15:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('migrationsdb', '0010_book_title_lower_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['last_name', 'first_name'], name='migrationsd_last_na_833058_idx'),
+        ),
+    ]
@@ -1,6 +1,11 @@
 # Create your models here.
-from django.db import models
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import models, transaction
+from django.db.models.functions import Lower
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import User as AuthUser
+from django.utils.functional import cached_property
 
 class User(models.Model):
     id = models.BigAutoField(primary_key=True)
@@ -35,12 +40,60 @@ class User(models.Model):
                 last_name=self.last_name
             )
             self.auth_user = auth_user
-            self.save()
+            self.save(update_fields=['auth_user'])
             return auth_user
         return self.auth_user
 
-    # Permisos personalizados
+    @classmethod
+    def bulk_create_auth_users(cls, credentials, batch_size=500):
+        """
+        Crea en bloque usuarios de autenticación para varios usuarios de biblioteca.
+        Las contraseñas se cifran en paralelo y los registros se insertan por lotes.
+        :param credentials: lista de tuplas (user, username, password)
+        :param batch_size: tamaño de lote para las inserciones y actualizaciones
+        :return: lista de usuarios de autenticación creados
+        """
+        # Igual que create_auth_user: omitir usuarios que ya tienen acceso
+        pending = [(user, username, password) for user, username, password in credentials if not user.auth_user_id]
+        if not pending:
+            return []
+
+        # El cifrado de contraseñas es costoso; hashlib libera el GIL
+        with ThreadPoolExecutor() as executor:
+            hashed = list(executor.map(make_password, [password for _, _, password in pending]))
+
+        auth_users = [
+            AuthUser(
+                username=AuthUser.normalize_username(username),
+                email=AuthUser.objects.normalize_email(user.email),
+                first_name=user.first_name,
+                last_name=user.last_name,
+                password=password_hash,
+            )
+            for (user, username, _), password_hash in zip(pending, hashed)
+        ]
+
+        with transaction.atomic():
+            AuthUser.objects.bulk_create(auth_users, batch_size=batch_size)
+
+            # Algunos motores (p. ej. SQLite) no devuelven los IDs tras bulk_create
+            if any(auth_user.pk is None for auth_user in auth_users):
+                by_username = AuthUser.objects.in_bulk(
+                    [auth_user.username for auth_user in auth_users], field_name='username'
+                )
+                auth_users = [by_username[auth_user.username] for auth_user in auth_users]
+
+            for (user, _, _), auth_user in zip(pending, auth_users):
+                user.auth_user = auth_user
+            cls.objects.bulk_update([user for user, _, _ in pending], ['auth_user'], batch_size=batch_size)
+
+        return auth_users
+
+    # Permisos personalizados e índice para el orden por apellido y nombre del home
     class Meta:
+        indexes = [
+            models.Index(fields=['last_name', 'first_name']),
+        ]
         permissions = [
             ("view_all_libraries", "Puede ver todas las bibliotecas"),
             ("manage_library", "Puede gestionar bibliotecas de usuarios"),
@@ -48,23 +101,27 @@ class User(models.Model):
             ("import_books", "Puede importar libros externos"),
         ]
 
+    @cached_property
+    def _group_names(self):
+        """
+        Nombres de los grupos del usuario de autenticación, calculados una sola vez.
+        Usa los datos precargados si la consulta incluye prefetch_related('auth_user__groups').
+        """
+        if not self.auth_user_id:
+            return frozenset()
+        return frozenset(group.name for group in self.auth_user.groups.all())
+
     def is_administrator(self):
         """Verifica si el usuario es administrador"""
-        if not self.auth_user:
-            return False
-        return self.auth_user.groups.filter(name='Administradores').exists()
+        return 'Administradores' in self._group_names
 
     def is_librarian(self):
         """Verifica si el usuario es bibliotecario"""
-        if not self.auth_user:
-            return False
-        return self.auth_user.groups.filter(name='Bibliotecarios').exists()
+        return 'Bibliotecarios' in self._group_names
 
     def has_group(self, group_name):
         """Verifica si el usuario pertenece a un grupo específico"""
-        if not self.auth_user:
-            return False
-        return self.auth_user.groups.filter(name=group_name).exists()
+        return group_name in self._group_names
 
 class Author(models.Model):
     id = models.BigAutoField(primary_key=True)
@@ -74,6 +131,12 @@ class Author(models.Model):
     nationality = models.CharField(max_length=100, verbose_name='Nacionalidad')
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Índice para el orden por apellido y nombre de los listados
+    class Meta:
+        indexes = [
+            models.Index(fields=['last_name', 'first_name']),
+        ]
+
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
 
@@ -86,6 +149,17 @@ class Genre(models.Model):
     def __str__(self):
         return self.name
 
+# Géneros de un libro para listados: solo se muestra el nombre
+GENRE_NAMES_PREFETCH = models.Prefetch('genres', queryset=Genre.objects.only('id', 'name'))
+
+class BookQuerySet(models.QuerySet):
+    def with_related(self):
+        """Carga autor y propietario con JOIN y los géneros (solo id y nombre) con una consulta adicional"""
+        return self.select_related('author', 'owner').prefetch_related(GENRE_NAMES_PREFETCH)
+
+class BookManager(models.Manager.from_queryset(BookQuerySet)):
+    pass
+
 class Book(models.Model):
     id = models.BigAutoField(primary_key=True)
     title = models.CharField(max_length=200, verbose_name='Título')
@@ -97,5 +171,16 @@ class Book(models.Model):
     genres = models.ManyToManyField('Genre', blank=False, verbose_name='Géneros')
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = BookManager()
+
+    # Índices para los filtros y ordenamientos más usados (author y owner ya tienen índice por ser FK)
+    class Meta:
+        indexes = [
+            models.Index(fields=['owner', '-created_at']),
+            models.Index(fields=['title']),
+            # Búsqueda de duplicados por título sin distinguir mayúsculas (ver import_service)
+            models.Index(Lower('title'), name='book_title_lower_idx'),
+        ]
+
     def __str__(self):
         return self.title
@@ -1,14 +1,28 @@
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
 from migrationsdb.models import Book, Genre
 
+DUPLICATE_GENRE_MESSAGE = "Ya existe un género con este nombre."
+
+
 class GenreSerializer(serializers.ModelSerializer):
     class Meta:
         model = Genre
         fields = ['id', 'name', 'description']
+        # La unicidad del nombre la garantiza la restricción UNIQUE de la base de datos;
+        # se omite el UniqueValidator para no hacer una consulta previa al guardar.
+        extra_kwargs = {'name': {'validators': []}}
+
+    def create(self, validated_data):
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError:
+            raise serializers.ValidationError({'name': [DUPLICATE_GENRE_MESSAGE]})
 
-    def validate_name(self, value):
-        """Validar que el nombre del género sea único"""
-        instance = self.instance
-        if Genre.objects.filter(name=value).exclude(pk=instance.pk if instance else None).exists():
-            raise serializers.ValidationError("Ya existe un género con este nombre.")
-        return value
\ No newline at end of file
+    def update(self, instance, validated_data):
+        try:
+            with transaction.atomic():
+                return super().update(instance, validated_data)
+        except IntegrityError:
+            raise serializers.ValidationError({'name': [DUPLICATE_GENRE_MESSAGE]})
@@ -1,7 +1,9 @@
 import io
 import os
+import threading
 import traceback
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 
 from django.conf import settings
 from pyhanko.sign import signers, fields
@@ -18,6 +20,33 @@ from asn1crypto import keys as asn1_keys
 from pyhanko_certvalidator.registry import CertificateRegistry
 
 
+@lru_cache(maxsize=1)
+def _load_file_signer(cert_path, private_key_path, passphrase, cert_mtime, key_mtime):
+    """
+    Carga el signer desde archivos. Cacheado por ruta, contraseña y fecha de
+    modificación, de modo que editar los archivos invalida la caché.
+    :return: SimpleSigner o None si no se pudo cargar
+    """
+    try:
+        # Cargar PKCS#12 si aplica
+        if cert_path.lower().endswith(('.p12', '.pfx')):
+            return signers.SimpleSigner.load_pkcs12(cert_path, passphrase=passphrase)
+
+        # Cargar par PEM
+        if key_mtime is None:
+            return None
+
+        # Cargar desde archivos PEM
+        return signers.SimpleSigner.load(
+            cert_file=cert_path,
+            key_file=private_key_path,
+            passphrase=passphrase
+        )
+    except Exception as e:
+        traceback.print_exc()
+        return None
+
+
 class DigitalSignatureService:
     """
     Servicio para firmar digitalmente PDF's.
@@ -29,6 +58,11 @@ class DigitalSignatureService:
     Si no hay configuración válida, usa un certificado autofirmado temporal para pruebas.
     """
 
+    # Signer autofirmado compartido por todas las instancias del proceso
+    _self_signed_signer = None
+    _self_signed_expires = None
+    _self_signed_lock = threading.Lock()
+
     def __init__(self):
         self.cert_path = getattr(settings, 'DIGITAL_CERT_PATH', None)
         self.private_key_path = getattr(settings, 'PRIVATE_KEY_PATH', None)
@@ -90,6 +124,7 @@ class DigitalSignatureService:
         """
         Intenta cargar un signer desde archivos configurados en settings:
         - PKCS#12 (*.p12/*.pfx) o par cert+key PEM.
+        El signer se reutiliza mientras los archivos no cambien (fecha de modificación).
         :return: SimpleSigner o None si no se pudo cargar
         """
 
@@ -104,38 +139,20 @@ class DigitalSignatureService:
             else self.cert_password
         )
 
-        # Intentar cargar el signer
-        try:
-            # Cargar PKCS#12 si aplica
-            if self.cert_path.lower().endswith(('.p12', '.pfx')):
-                return signers.SimpleSigner.load_pkcs12(self.cert_path, passphrase=passphrase)
-
-            # Cargar par PEM
-            if not self.private_key_path or not os.path.exists(self.private_key_path):
-                return None
-
-            # Cargar desde archivos PEM
-            return signers.SimpleSigner.load(
-                cert_file=self.cert_path,
-                key_file=self.private_key_path,
-                passphrase=passphrase
-            )
-        except Exception as e:
-            traceback.print_exc()
-            return None
+        # Fechas de modificación como parte de la clave de caché
+        cert_mtime = os.path.getmtime(self.cert_path)
+        key_mtime = (
+            os.path.getmtime(self.private_key_path)
+            if self.private_key_path and os.path.exists(self.private_key_path)
+            else None
+        )
+        return _load_file_signer(self.cert_path, self.private_key_path, passphrase, cert_mtime, key_mtime)
 
-    def get_signer(self):
+    def _build_self_signed_signer(self):
         """
-        Obtiene un SimpleSigner válido, ya sea desde archivos o creando uno autofirmado.
-        :return: SimpleSigner listo para usar
+        Crea un SimpleSigner a partir de un certificado autofirmado nuevo.
+        :return: (SimpleSigner, fecha de expiración del certificado)
         """
-
-        # Intentar cargar desde archivos configurados
-        signer = self._load_signer_from_files()
-        if signer:
-            return signer
-
-        # Certificado autofirmado
         private_key, cert = self.create_self_signed_cert()
         try:
             # Convertir a asn1crypto para pyHanko
@@ -154,36 +171,67 @@ class DigitalSignatureService:
                 signing_key=asn1_priv,
                 cert_registry=cert_registry
             )
-            return signer
+            return signer, cert.not_valid_after_utc
         except Exception as e:
             traceback.print_exc()
             raise
 
+    def get_signer(self):
+        """
+        Obtiene un SimpleSigner válido, ya sea desde archivos o creando uno autofirmado.
+        El signer autofirmado se genera una vez por proceso y se renueva cuando
+        le queda menos de un día de validez.
+        :return: SimpleSigner listo para usar
+        """
+
+        # Intentar cargar desde archivos configurados
+        signer = self._load_signer_from_files()
+        if signer:
+            return signer
+
+        # Certificado autofirmado (cacheado a nivel de clase)
+        cls = DigitalSignatureService
+        with cls._self_signed_lock:
+            now = datetime.now(timezone.utc)
+            if cls._self_signed_signer is None or cls._self_signed_expires - now < timedelta(days=1):
+                cls._self_signed_signer, cls._self_signed_expires = self._build_self_signed_signer()
+            return cls._self_signed_signer
+
     def sign_pdf(self, pdf_bytes, reason="Documento generado automáticamente",
-                 location="Sistema Biblioteca", add_visual_signature=True):
+                 location="Sistema Biblioteca", add_visual_signature=True, out_stream=None):
         """
         Firma el PDF (saneando encabezado si es necesario) y devuelve los bytes firmados.
+        Si se indica out_stream, el PDF firmado se escribe directamente en él (sin copiarlo
+        a un objeto bytes) y se devuelve el stream posicionado al inicio.
         :param pdf_bytes: bytes del PDF a firmar
         :param reason: motivo de la firma
         :param location: ubicación de la firma
         :param add_visual_signature: si True, agrega una firma visual en la página 0
-        :return: bytes del PDF firmado, o los originales si hubo error
+        :param out_stream: stream binario opcional donde escribir el PDF firmado
+        :return: bytes del PDF firmado, o los originales si hubo error o ya estaba firmado.
+                 Con out_stream: el stream con el PDF firmado, o None en esos casos.
         """
+        # Valor devuelto cuando no se puede firmar
+        fallback = pdf_bytes if out_stream is None else None
         try:
             # Validar bytes de entrada
             if not pdf_bytes:
                 print("[DigitalSignatureService] pdf_bytes vacío, no se puede firmar.")
-                return pdf_bytes
+                return fallback
 
-            # Buscar el inicio del PDF
-            idx = pdf_bytes.find(b'%PDF-')
+            # Buscar el inicio del PDF (la cabecera debe estar en los primeros 1024 bytes)
+            idx = pdf_bytes.find(b'%PDF-', 0, 1024)
             if idx == -1:
-                return pdf_bytes
-            if idx > 0:
-                pdf_bytes = pdf_bytes[idx:]
+                return fallback
+
+            # Si ya contiene un diccionario de firma, no volver a firmar: el campo
+            # de firma ya estaría ocupado y pyHanko fallaría tras el trabajo criptográfico
+            if b'/Type /Sig' in pdf_bytes:
+                return fallback
 
-            # Preparar writer incremental
-            input_stream = io.BytesIO(pdf_bytes)
+            # Preparar writer incremental. BytesIO comparte el buffer de un objeto bytes,
+            # así que solo se copia cuando hay que recortar basura previa a la cabecera.
+            input_stream = io.BytesIO(pdf_bytes[idx:] if idx > 0 else pdf_bytes)
             writer = incremental_writer.IncrementalPdfFileWriter(input_stream)
 
             # Obtener signer
@@ -203,14 +251,16 @@ class DigitalSignatureService:
                     on_page=0,
                     box=(400, 50, 550, 120)
                 )
-                out = signers.sign_pdf(writer, meta, signer=signer, new_field_spec=sig_field_spec)
+                out = signers.sign_pdf(writer, meta, signer=signer, new_field_spec=sig_field_spec,
+                                       output=out_stream)
             else:
-                out = signers.sign_pdf(writer, meta, signer=signer)
+                out = signers.sign_pdf(writer, meta, signer=signer, output=out_stream)
 
-            result = out.getvalue()
-            delta = len(result) - len(pdf_bytes)
-            return result
+            if out_stream is not None:
+                out.seek(0)
+                return out
+            return out.getvalue()
 
         except Exception as e:
             traceback.print_exc()
-            return pdf_bytes
\ No newline at end of file
+            return fallback
@@ -0,0 +1,211 @@
+from django.contrib.auth.models import Group, Permission
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+
+from migrationsdb.backends import invalidate_perms_cache
+from migrationsdb.models import User, Book, Author, Genre
+
+"""
+Servicio para configurar los grupos y permisos por defecto del sistema de biblioteca.
+Usado por el comando setup_initial_groups y por la vista setup_groups.
+"""
+
+ALL_GROUPS_CACHE_KEY = 'auth:groups:all'
+ALL_GROUPS_CACHE_TTL = 3600  # segundos
+
+# Definición de grupos y permisos (usando app_label.codename)
+GROUPS_CONFIG = {
+    'Administradores': {
+        'description': 'Acceso completo al sistema',
+        'permissions': [
+            # Usuarios
+            ('migrationsdb', 'add_user'),
+            ('migrationsdb', 'change_user'),
+            ('migrationsdb', 'delete_user'),
+            ('migrationsdb', 'view_user'),
+            # Libros
+            ('migrationsdb', 'add_book'),
+            ('migrationsdb', 'change_book'),
+            ('migrationsdb', 'delete_book'),
+            ('migrationsdb', 'view_book'),
+            # Autores
+            ('migrationsdb', 'add_author'),
+            ('migrationsdb', 'change_author'),
+            ('migrationsdb', 'delete_author'),
+            ('migrationsdb', 'view_author'),
+            # Géneros
+            ('migrationsdb', 'add_genre'),
+            ('migrationsdb', 'change_genre'),
+            ('migrationsdb', 'delete_genre'),
+            ('migrationsdb', 'view_genre'),
+            # Permisos personalizados
+            ('migrationsdb', 'view_all_libraries'),
+            ('migrationsdb', 'manage_library'),
+            ('migrationsdb', 'generate_reports'),
+            ('migrationsdb', 'import_books'),
+        ]
+    },
+    'Bibliotecarios': {
+        'description': 'Gestión de libros y bibliotecas de usuarios',
+        'permissions': [
+            # Solo visualización de usuarios
+            ('migrationsdb', 'view_user'),
+            # Gestión completa de libros
+            ('migrationsdb', 'add_book'),
+            ('migrationsdb', 'change_book'),
+            ('migrationsdb', 'delete_book'),
+            ('migrationsdb', 'view_book'),
+            # Gestión de autores y géneros
+            ('migrationsdb', 'add_author'),
+            ('migrationsdb', 'change_author'),
+            ('migrationsdb', 'delete_author'),
+            ('migrationsdb', 'view_author'),
+            ('migrationsdb', 'add_genre'),
+            ('migrationsdb', 'change_genre'),
+            ('migrationsdb', 'delete_genre'),
+            ('migrationsdb', 'view_genre'),
+            # Permisos especiales
+            ('migrationsdb', 'view_all_libraries'),
+            ('migrationsdb', 'manage_library'),
+            ('migrationsdb', 'generate_reports'),
+            ('migrationsdb', 'import_books'),
+        ]
+    },
+    'Lectores': {
+        'description': 'Acceso básico para gestionar su propia biblioteca',
+        'permissions': [
+            # Solo ver libros y autores
+            ('migrationsdb', 'view_book'),
+            ('migrationsdb', 'view_author'),
+            ('migrationsdb', 'view_genre'),
+            # No pueden ver otros usuarios
+        ]
+    },
+    'Invitados': {
+        'description': 'Acceso de solo lectura',
+        'permissions': [
+            ('migrationsdb', 'view_book'),
+            ('migrationsdb', 'view_author'),
+            ('migrationsdb', 'view_genre'),
+        ]
+    }
+}
+
+
+def get_all_groups():
+    """
+    Devuelve todos los grupos ordenados por nombre, anotados con su número de permisos
+    (perm_count). La lista de instancias se guarda en caché y se invalida desde las señales
+    de Group y de sus permisos (ver migrationsdb.signals) y desde setup_initial_groups.
+    :return: lista de Group
+    """
+    return cache.get_or_set(
+        ALL_GROUPS_CACHE_KEY,
+        lambda: list(Group.objects.annotate(perm_count=Count('permissions')).order_by('name')),
+        ALL_GROUPS_CACHE_TTL,
+    )
+
+
+def invalidate_groups_cache():
+    """Descarta la lista de grupos cacheada por get_all_groups."""
+    cache.delete(ALL_GROUPS_CACHE_KEY)
+
+
+def setup_initial_groups(reset=False, log=None):
+    """
+    Configura los grupos por defecto con sus permisos correspondientes.
+    Todas las escrituras se hacen en una sola transacción.
+    :param reset: si True, elimina todos los grupos existentes antes de crearlos
+    :param log: función opcional log(mensaje, warning=False) para informar el progreso
+    :return: lista con los nombres de los grupos creados
+    """
+    log = log or (lambda message, warning=False: None)
+
+    with transaction.atomic():
+        if reset:
+            log('Eliminando grupos existentes...', warning=True)
+            Group.objects.all().delete()
+        return _setup_groups_and_permissions(log)
+
+
+def _setup_groups_and_permissions(log):
+    """
+    Crea los grupos de GROUPS_CONFIG que falten y sincroniza sus permisos.
+    :param log: función log(mensaje, warning=False) para informar el progreso
+    :return: lista con los nombres de los grupos creados
+    """
+    created_groups = []
+    permissions_changed = False
+
+    # Obtener tipos de contenido en una sola consulta
+    models_by_name = {'user': User, 'book': Book, 'author': Author, 'genre': Genre}
+    cts = {
+        ct.model: ct
+        for ct in ContentType.objects.filter(app_label='migrationsdb', model__in=list(models_by_name))
+    }
+    # Crear los que falten (p. ej. base de datos recién migrada)
+    for name, model in models_by_name.items():
+        if name not in cts:
+            cts[name] = ContentType.objects.get_for_model(model)
+    user_ct = cts['user']
+    book_ct = cts['book']
+    author_ct = cts['author']
+    genre_ct = cts['genre']
+
+    # Precargar todos los permisos relevantes en una sola consulta
+    perms = {
+        (p.content_type_id, p.codename): p
+        for p in Permission.objects.filter(
+            content_type__in=[user_ct, book_ct, author_ct, genre_ct]
+        ).only('id', 'codename', 'content_type_id')
+    }
+
+    # Crear grupos y asignar permisos
+    for group_name, config in GROUPS_CONFIG.items():
+        group, created = Group.objects.get_or_create(name=group_name)
+
+        if created:
+            created_groups.append(group_name)
+            log(f'✓ Grupo "{group_name}" creado')
+        else:
+            log(f'→ Grupo "{group_name}" ya existe, actualizando permisos')
+
+        # Resolver permisos
+        permission_ids = []
+        for app_label, codename in config['permissions']:
+            # Obtener el content_type específico según el modelo (sufijo del codename).
+            # Para permisos personalizados, usar el content_type de User
+            content_type = cts.get(codename.rsplit('_', 1)[-1], user_ct)
+
+            permission = perms.get((content_type.id, codename))
+            if permission is None:
+                log(f'  Permiso no encontrado: {app_label}.{codename}', warning=True)
+                continue
+            permission_ids.append(permission.id)
+
+        # Aplicar solo la diferencia con los permisos actuales
+        GroupPermission = Group.permissions.through
+        current_ids = set(group.permissions.values_list('id', flat=True))
+        desired_ids = set(permission_ids)
+        to_add = desired_ids - current_ids
+        to_remove = current_ids - desired_ids
+        permissions_changed = permissions_changed or bool(to_add or to_remove)
+        if to_remove:
+            GroupPermission.objects.filter(group=group, permission_id__in=to_remove).delete()
+        if to_add:
+            GroupPermission.objects.bulk_create(
+                [GroupPermission(group_id=group.id, permission_id=pid) for pid in to_add],
+                ignore_conflicts=True,
+                batch_size=500,
+            )
+
+        log(f'  → {len(permission_ids)} permisos asignados')
+
+    # Las escrituras directas sobre la tabla intermedia no envían m2m_changed
+    if permissions_changed:
+        transaction.on_commit(invalidate_groups_cache)
+        transaction.on_commit(invalidate_perms_cache)
+
+    return created_groups
\ No newline at end of file
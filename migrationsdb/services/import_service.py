@@ -0,0 +1,230 @@
+from datetime import date
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Q, Value
+from django.db.models.functions import Lower
+
+from migrationsdb.models import Book, Author, Genre
+from migrationsdb.services.pdf_services import invalidate_pdf_cache
+
+"""
+Servicio para importar libros con el formato de openlibrary_service
+({title, authors, year, isbn, pages, subjects}) usando inserciones en bloque.
+"""
+BATCH_SIZE = 500  # filas por INSERT
+LOOKUP_BATCH_SIZE = 200  # condiciones OR por consulta de búsqueda
+MAX_SUBJECTS = 5  # géneros importados por libro
+
+DEFAULT_DATE = date(1900, 1, 1)
+DEFAULT_PAGES = 100
+
+
+def _chunks(items, size):
+    """
+    Divide una lista en bloques de tamaño size.
+    :param items: lista a dividir
+    :param size: tamaño máximo de cada bloque
+    :return: generador de sublistas
+    """
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def split_author(full_name: str):
+    """
+    Divide un nombre completo en (last_name, first_name) simple.
+    Si solo hay un nombre, last_name es ese nombre y first_name es vacío.
+    Si está vacío, devuelve ("Desconocido", "Autor").
+    :param full_name: Nombre completo del autor.
+    :return: Tupla (last_name, first_name)
+    """
+    parts = (full_name or "").strip().split()
+    if not parts:
+        return "Desconocido", "Autor"
+    if len(parts) == 1:
+        return parts[0], ""
+    return parts[-1], " ".join(parts[:-1])
+
+
+def _normalize(item):
+    """
+    Convierte un libro de Open Library en los valores que se guardan en la base de datos.
+    :param item: dict {title, authors, year, isbn, pages, subjects}
+    :return: dict con title, isbn, author (first_name, last_name), published_date, pages y subjects
+    """
+    author_name = (item["authors"][0] if item.get("authors") else "Autor Desconocido").strip()
+    ln, fn = split_author(author_name)
+    year = item.get("year")
+    return {
+        "title": (item.get("title") or "Sin título")[:200],
+        "isbn": str(item["isbn"])[:13] if item.get("isbn") else None,
+        "author": (fn or "N/A", ln or "N/A"),
+        "published_date": date(int(year), 1, 1) if isinstance(year, int) and 1 <= year <= 9999 else DEFAULT_DATE,
+        "pages": int(item["pages"]) if str(item.get("pages", "")).isdigit() else DEFAULT_PAGES,
+        "subjects": list(dict.fromkeys(str(s)[:50] for s in (item.get("subjects") or [])[:MAX_SUBJECTS])),
+    }
+
+
+def _duplicate_key(title, last_name):
+    """Clave de duplicado por título + apellido del primer autor, sin distinguir mayúsculas."""
+    return title.lower(), last_name.lower()
+
+
+def _find_existing_books(rows):
+    """
+    Busca libros ya guardados que coincidan por ISBN o por título + apellido del autor.
+    :param rows: lista de libros normalizados (ver _normalize)
+    :return: (dict {isbn: Book}, dict {(título, apellido): Book})
+    """
+    by_isbn, by_key = {}, {}
+    for chunk in _chunks(rows, LOOKUP_BATCH_SIZE):
+        conditions = []
+        for row in chunk:
+            conditions.append(Q(title_lower=Lower(Value(row["title"])), author__last_name__iexact=row["author"][1]))
+            if row["isbn"]:
+                conditions.append(Q(isbn=row["isbn"]))
+        # LOWER(title) usa el índice funcional de Book en lugar de recorrer la tabla
+        existing = Book.objects.annotate(title_lower=Lower('title')).filter(reduce(or_, conditions)).select_related(
+            'author'
+        ).only('id', 'title', 'isbn', 'author__last_name')
+        for book in existing:
+            if book.isbn:
+                by_isbn.setdefault(book.isbn, book)
+            by_key.setdefault(_duplicate_key(book.title, book.author.last_name), book)
+    return by_isbn, by_key
+
+
+def _get_or_create_authors(names):
+    """
+    Obtiene los autores por (first_name, last_name) y crea en bloque los que falten.
+    :param names: lista de tuplas (first_name, last_name) sin repetir
+    :return: dict {(first_name, last_name): author_id}
+    """
+    def lookup(pending):
+        found = {}
+        for chunk in _chunks(pending, LOOKUP_BATCH_SIZE):
+            conditions = [Q(first_name=fn, last_name=ln) for fn, ln in chunk]
+            for author_id, fn, ln in Author.objects.filter(reduce(or_, conditions)).values_list(
+                'id', 'first_name', 'last_name'
+            ).order_by('id'):
+                found.setdefault((fn, ln), author_id)
+        return found
+
+    authors = lookup(names)
+    missing = [name for name in names if name not in authors]
+    if missing:
+        Author.objects.bulk_create(
+            [Author(first_name=fn, last_name=ln, birth_date=DEFAULT_DATE, nationality="N/D") for fn, ln in missing],
+            batch_size=BATCH_SIZE,
+        )
+        # Algunos motores (p. ej. SQLite) no devuelven los IDs tras bulk_create
+        authors.update(lookup(missing))
+    return authors
+
+
+def _get_or_create_genres(names):
+    """
+    Crea en bloque los géneros que falten y los obtiene todos.
+    :param names: lista de nombres de género sin repetir
+    :return: dict {nombre: genre_id}
+    """
+    if not names:
+        return {}
+    Genre.objects.bulk_create(
+        [Genre(name=name, description="") for name in names],
+        ignore_conflicts=True,
+        batch_size=BATCH_SIZE,
+    )
+    genres = {}
+    for chunk in _chunks(names, LOOKUP_BATCH_SIZE * 5):
+        genres.update(Genre.objects.filter(name__in=chunk).values_list('name', 'id'))
+    return genres
+
+
+@transaction.atomic
+def import_books_bulk(items, owner=None):
+    """
+    Importa varios libros con un número constante de consultas por lote:
+    autores, géneros, libros y relaciones libro-género se insertan con bulk_create.
+    Evita duplicados por ISBN o por título+primer autor, tanto con libros ya
+    guardados como entre los elementos recibidos.
+    :param items: lista de dicts {title, authors, year, isbn, pages, subjects}
+    :param owner: User opcional para asignar como propietario de los libros nuevos
+    :return: lista de tuplas (Book, creado) en el mismo orden que items;
+             si el libro ya existía se devuelve el existente con creado=False
+    """
+    rows = [_normalize(item) for item in items]
+    if not rows:
+        return []
+    by_isbn, by_key = _find_existing_books(rows)
+
+    # Decidir qué filas son nuevas. Cada resultado es (Book, creado) o, si la fila
+    # repite otra de items, el índice de su primera aparición
+    results = [None] * len(rows)
+    new_rows = []
+    for index, row in enumerate(rows):
+        key = _duplicate_key(row["title"], row["author"][1])
+        existing = by_isbn.get(row["isbn"]) if row["isbn"] else None
+        if existing is None:
+            existing = by_key.get(key)
+        if existing is not None:
+            results[index] = existing if isinstance(existing, int) else (existing, False)
+            continue
+        new_rows.append((index, row))
+        by_key[key] = index
+        if row["isbn"]:
+            by_isbn[row["isbn"]] = index
+
+    # Autores y géneros de los libros nuevos
+    authors = _get_or_create_authors(list(dict.fromkeys(row["author"] for _, row in new_rows)))
+    genres = _get_or_create_genres(list(dict.fromkeys(name for _, row in new_rows for name in row["subjects"])))
+
+    # Crear libros
+    new_books = [
+        Book(
+            title=row["title"],
+            author_id=authors[row["author"]],
+            owner=owner,
+            published_date=row["published_date"],
+            isbn=row["isbn"],
+            pages=row["pages"],
+        )
+        for _, row in new_rows
+    ]
+    Book.objects.bulk_create(new_books, batch_size=BATCH_SIZE)
+
+    # Algunos motores (p. ej. SQLite) no devuelven los IDs tras bulk_create. Título y autor
+    # identifican cada libro nuevo: cualquier otro con ambos habría sido un duplicado
+    if any(book.pk is None for book in new_books):
+        saved = {}
+        for chunk in _chunks(new_books, LOOKUP_BATCH_SIZE * 5):
+            for book_id, title, author_id in Book.objects.filter(
+                title__in=[book.title for book in chunk],
+                author_id__in={book.author_id for book in chunk},
+            ).values_list('id', 'title', 'author_id'):
+                saved[(title, author_id)] = book_id
+        for book in new_books:
+            book.pk = saved[(book.title, book.author_id)]
+
+    for (index, _), book in zip(new_rows, new_books):
+        results[index] = (book, True)
+
+    # Relaciones libro-género en un solo INSERT por lote
+    Through = Book.genres.through
+    Through.objects.bulk_create(
+        [
+            Through(book_id=book.pk, genre_id=genres[name])
+            for (_, row), book in zip(new_rows, new_books)
+            for name in row["subjects"]
+        ],
+        batch_size=BATCH_SIZE * 2,
+        ignore_conflicts=True,
+    )
+
+    # bulk_create no emite señales: invalidar los PDF cacheados manualmente
+    if new_books:
+        invalidate_pdf_cache()
+
+    return [(results[result][0], False) if isinstance(result, int) else result for result in results]
@@ -1,7 +1,11 @@
+import re
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 
 import requests
 from django.core.cache import cache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 """
 Servicio para buscar libros en Open Library (https://openlibrary.org/developers/api).
@@ -10,6 +14,25 @@ Usa la API pública sin autenticación.
 BASE_URL = "https://openlibrary.org"
 TIMEOUT = 10
 CACHE_TTL = 600  # segundos
+ISBN_BATCH_SIZE = 50  # ISBN por búsqueda en get_books_by_isbns
+USER_AGENT = "MigrationsPj-Biblioteca/1.0"
+PREFETCH_LOCK_TTL = 30  # segundos
+
+_ISBN13_RE = re.compile(r"[0-9]{13}")
+_ISBN10_RE = re.compile(r"[0-9]{9}[0-9X]")
+_ISBN_STRIP = str.maketrans("", "", "- ")
+
+# Sesión compartida: reutiliza conexiones HTTPS (keep-alive) y reintenta errores transitorios
+_session = requests.Session()
+_session.headers.update({"User-Agent": USER_AGENT})
+_session.mount("https://", HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=20,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504]),
+))
+
+# Hilos para precargar la página siguiente de search_books
+_prefetch_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="ol-prefetch")
 
 
 def _get_json(url: str, params: Optional[dict] = None):
@@ -21,7 +44,7 @@ def _get_json(url: str, params: Optional[dict] = None):
     :return: dict con JSON decodificado
     """
     params = params or {}
-    resp = requests.get(url, params=params, timeout=TIMEOUT)
+    resp = _session.get(url, params=params, timeout=TIMEOUT)
     resp.raise_for_status()
     return resp.json()
 
@@ -29,21 +52,19 @@ def _get_json(url: str, params: Optional[dict] = None):
 def _pick_isbn(doc) -> Optional[str]:
     """
     Dado un documento de Open Library, retorna el ISBN a usar (priorizando ISBN13).
+    Recorre la lista una sola vez: devuelve el primer ISBN13 y, si no hay, el primer ISBN10.
     :param doc: dict con datos del libro
     :return: ISBN o None
     """
-    isbns = doc.get("isbn") or []
-    # Priorizar ISBN13
-    for v in isbns:
-        s = str(v).replace("-", "").upper().strip()
-        if len(s) == 13 and s.isdigit():
-            return s
-    # Luego ISBN10 (permitiendo dígito de control X)
-    for v in isbns:
-        s = str(v).replace("-", "").upper().strip()
-        if len(s) == 10 and s[:-1].isdigit() and (s[-1].isdigit() or s[-1] == "X"):
+    isbn10 = None
+    for v in doc.get("isbn") or []:
+        s = str(v).translate(_ISBN_STRIP).upper()
+        if _ISBN13_RE.fullmatch(s):
             return s
-    return None
+        # ISBN10 permite dígito de control X
+        if isbn10 is None and _ISBN10_RE.fullmatch(s):
+            isbn10 = s
+    return isbn10
 
 
 def _cover_url(doc, isbn: Optional[str]):
@@ -55,10 +76,76 @@ def _cover_url(doc, isbn: Optional[str]):
     return None
 
 
+def _build_book(doc, isbn: Optional[str]):
+    """
+    Convierte un documento de search.json al formato usado por la aplicación.
+    :param doc: dict con datos del libro
+    :param isbn: ISBN elegido para el libro
+    :return: {title, authors, year, isbn, pages, subjects, cover_url}
+    """
+    return {
+        "title": doc.get("title") or "",
+        "authors": doc.get("author_name") or [],
+        "year": doc.get("first_publish_year") or None,
+        "isbn": isbn,
+        "pages": doc.get("number_of_pages_median") or None,
+        "subjects": doc.get("subject") or [],
+        "cover_url": _cover_url(doc, isbn),
+    }
+
+
+def _search_cache_key(q: str, page: int, page_size: int) -> str:
+    return f"ol:search:{q}:{page}:{page_size}"
+
+
+def _fetch_search_page(q: str, page: int, page_size: int):
+    """
+    Consulta una página de search.json y guarda el resultado en caché.
+    :param q: término de búsqueda ya limpio
+    :param page: página (1..N) ya validada
+    :param page_size: tamaño de página ya validado
+    :return: dict con resultados y paginación
+    """
+    params = {"q": q, "page": page, "limit": page_size}
+    data = _get_json(f"{BASE_URL}/search.json", params=params)
+
+    items = []
+    for d in data.get("docs", []):
+        items.append(_build_book(d, _pick_isbn(d)))
+
+    total = int(data.get("numFound", 0) or 0)
+    next_page = page + 1 if (page * page_size) < total else None
+    prev_page = page - 1 if page > 1 else None
+
+    result = {"items": items, "page": page, "next": next_page, "prev": prev_page, "total": total}
+    cache.set(_search_cache_key(q, page, page_size), result, CACHE_TTL)
+    return result
+
+
+def _prefetch_search_page(q: str, page: int, page_size: int):
+    """
+    Programa en segundo plano la descarga de una página para que esté en caché
+    cuando el usuario la pida. Un candado de caché evita descargas duplicadas.
+    """
+    lock_key = f"ol:prefetch_lock:{q}:{page}:{page_size}"
+    if not cache.add(lock_key, True, PREFETCH_LOCK_TTL):
+        return
+
+    def _run():
+        try:
+            _fetch_search_page(q, page, page_size)
+        except Exception:
+            # La precarga es opcional: si falla, la página se pedirá al navegar
+            pass
+
+    _prefetch_executor.submit(_run)
+
+
 def search_books(q: str, page: int = 1, page_size: int = 20):
     """
     Busca libros en Open Library y devuelve:
     {items: [{title, authors, year, isbn, pages, subjects, cover_url}], page, next, prev, total}
+    Si hay página siguiente y no está en caché, la precarga en segundo plano.
     :param q: término de búsqueda
     :param page: página (1..N)
     :param page_size: tamaño de página (1..100)
@@ -73,34 +160,15 @@ def search_books(q: str, page: int = 1, page_size: int = 20):
     # Validar y limitar paginación
     page = max(1, int(page or 1))
     page_size = max(1, min(100, int(page_size or 20)))
-    cache_key = f"ol:search:{q}:{page}:{page_size}"
-    cached = cache.get(cache_key)
-    if cached:
-        return cached
 
-    params = {"q": q, "page": page, "limit": page_size}
-    data = _get_json(f"{BASE_URL}/search.json", params=params)
+    # Consultar la página actual y la siguiente en una sola operación de caché
+    cache_key = _search_cache_key(q, page, page_size)
+    next_key = _search_cache_key(q, page + 1, page_size)
+    cached = cache.get_many([cache_key, next_key])
 
-    items = []
-    for d in data.get("docs", []):
-        picked = _pick_isbn(d)
-        item = {
-            "title": d.get("title") or "",
-            "authors": d.get("author_name") or [],
-            "year": d.get("first_publish_year") or None,
-            "isbn": picked,
-            "pages": d.get("number_of_pages_median") or None,
-            "subjects": d.get("subject") or [],
-            "cover_url": _cover_url(d, picked),
-        }
-        items.append(item)
-
-    total = int(data.get("numFound", 0) or 0)
-    next_page = page + 1 if (page * page_size) < total else None
-    prev_page = page - 1 if page > 1 else None
-
-    result = {"items": items, "page": page, "next": next_page, "prev": prev_page, "total": total}
-    cache.set(cache_key, result, CACHE_TTL)
+    result = cached.get(cache_key) or _fetch_search_page(q, page, page_size)
+    if result["next"] is not None and next_key not in cached:
+        _prefetch_search_page(q, result["next"], page_size)
     return result
 
 
@@ -133,15 +201,50 @@ def get_book_by_isbn(isbn: str):
         return None
 
     d = docs[0]
-    picked = _pick_isbn(d) or isbn
-    book = {
-        "title": d.get("title") or "",
-        "authors": d.get("author_name") or [],
-        "year": d.get("first_publish_year") or None,
-        "isbn": picked,
-        "pages": d.get("number_of_pages_median") or None,
-        "subjects": d.get("subject") or [],
-        "cover_url": _cover_url(d, picked),
-    }
+    book = _build_book(d, _pick_isbn(d) or isbn)
     cache.set(cache_key, book, CACHE_TTL)
-    return book
\ No newline at end of file
+    return book
+
+
+def get_books_by_isbns(isbns):
+    """
+    Obtiene datos de varios libros por ISBN con el mínimo de peticiones.
+    Consulta primero el caché en bloque y agrupa los ISBN restantes en
+    búsquedas de hasta ISBN_BATCH_SIZE ISBN cada una.
+    :param isbns: iterable de ISBN10 o ISBN13 (con o sin guiones)
+    :return: dict {isbn_limpio: {title, authors, year, isbn, pages, subjects, cover_url}}
+             con los ISBN encontrados.
+    """
+
+    # Limpiar y eliminar duplicados conservando el orden
+    cleaned = []
+    for isbn in isbns:
+        isbn_clean = (isbn or "").replace("-", "").strip().upper()
+        if isbn_clean and isbn_clean != "NO-ISBN" and isbn_clean not in cleaned:
+            cleaned.append(isbn_clean)
+    if not cleaned:
+        return {}
+
+    # Obtener información del caché en una sola operación
+    cache_keys = {f"ol:isbn:{isbn}": isbn for isbn in cleaned}
+    cached = cache.get_many(list(cache_keys))
+    books = {cache_keys[key]: book for key, book in cached.items() if book}
+
+    # Buscar los faltantes en Open Library por lotes
+    missing = [isbn for isbn in cleaned if isbn not in books]
+    found = {}
+    for start in range(0, len(missing), ISBN_BATCH_SIZE):
+        chunk = missing[start:start + ISBN_BATCH_SIZE]
+        query = " OR ".join(f"isbn:{isbn}" for isbn in chunk)
+        data = _get_json(f"{BASE_URL}/search.json", params={"q": query, "limit": len(chunk)})
+        pending = set(chunk)
+        for d in data.get("docs") or []:
+            doc_isbns = {str(v).replace("-", "").strip().upper() for v in d.get("isbn") or []}
+            for isbn in pending & doc_isbns:
+                found[isbn] = _build_book(d, _pick_isbn(d) or isbn)
+            pending -= doc_isbns
+
+    if found:
+        cache.set_many({f"ol:isbn:{isbn}": book for isbn, book in found.items()}, CACHE_TTL)
+        books.update(found)
+    return books
\ No newline at end of file
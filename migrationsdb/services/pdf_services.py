@@ -1,59 +1,182 @@
+import hashlib
+import logging
+import threading
+import uuid
 from io import BytesIO
-import traceback
-from django.http import HttpResponse
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.http import FileResponse
 from reportlab.lib.pagesizes import A4
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib import colors
 
+from migrationsdb.models import Book
 from migrationsdb.services.digital_signature_service import DigitalSignatureService
 
+logger = logging.getLogger(__name__)
 
-def _build_table_books(books):
+PDF_CACHE_TTL = 3600  # segundos
+_PDF_CACHE_VERSION_KEY = 'pdf:version'
+
+# Servicio de firma compartido, creado bajo demanda (ver _get_signer)
+_SIGNER = None
+_SIGNER_LOCK = threading.Lock()
+
+# Estilos compartidos, construidos una sola vez al importar el módulo
+_STYLES = getSampleStyleSheet()
+_TITLE_STYLE = ParagraphStyle(
+    'CustomTitle', parent=_STYLES['Heading1'],
+    fontSize=18, spaceAfter=20, alignment=1, textColor=colors.darkblue
+)
+
+# Cabecera de la tabla de libros
+_HEADER_ROW = ('Título', 'Autor', 'Páginas', 'Publicado', 'Géneros')
+# Alto de fila de la tabla de libros: una línea (interlineado 12) más 3 pt de relleno arriba y abajo
+_ROW_HEIGHT = 18
+# Filas leídas por bloque al recorrer los libros del reporte
+_ITERATOR_CHUNK_SIZE = 500
+
+# Bloque de estadísticas como tabla de texto plano (sin el parser de marcado de Paragraph)
+_STATS_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, -1), colors.lightgrey),
+    ('TEXTCOLOR', (0, 0), (-1, -1), colors.darkblue),
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 11),
+    ('TOPPADDING', (0, 0), (-1, -1), 4),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+])
+
+_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 12),
+    ('ALIGN', (2, 1), (2, -1), 'RIGHT'),
+    ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.whitesmoke, colors.lightgrey]),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+])
+
+
+def _truncate(text, limit):
+    """
+    Recorta el texto a limit caracteres, añadiendo '...' si se recortó.
+    :param text: texto a recortar
+    :param limit: longitud máxima antes de los puntos suspensivos
+    :return: texto recortado
+    """
+    return text[:limit] + '...' if len(text) > limit else text
+
+
+def _book_rows(books):
     """
-    Construye una tabla de ReportLab con los libros proporcionados.
+    Construye las filas de la tabla de libros recorriendo el queryset por bloques
+    (iterator con chunk_size), sin instanciar objetos Book, Author ni Genre.
+    Los nombres de los géneros se cargan con una sola consulta values_list.
     :param books: queryset de Book
+    :return: lista de filas [título, autor, páginas, publicado, géneros]
+    """
+    # Nombres de géneros agrupados por libro
+    genre_names = {}
+    links = Book.genres.through.objects.filter(book__in=books.values('pk')).values_list('book_id', 'genre__name')
+    for book_id, name in links.iterator(chunk_size=_ITERATOR_CHUNK_SIZE):
+        genre_names.setdefault(book_id, []).append(name)
+
+    # Solo las columnas que se muestran; el autor llega por JOIN
+    values = books.prefetch_related(None).values_list(
+        'id', 'title', 'author__first_name', 'author__last_name', 'pages', 'published_date'
+    )
+    return [
+        [
+            _truncate(title, 50),
+            _truncate(f"{first_name} {last_name}", 35),
+            str(pages),
+            str(published_date),
+            _truncate(', '.join(genre_names.get(book_id, ())), 60),
+        ]
+        for book_id, title, first_name, last_name, pages, published_date
+        in values.iterator(chunk_size=_ITERATOR_CHUNK_SIZE)
+    ]
+
+
+def _build_table_books(rows):
+    """
+    Construye una tabla de ReportLab con las filas de libros proporcionadas.
+    :param rows: lista de filas de libros (ver _book_rows)
     :return: Table de ReportLab
     """
-    # Construir datos de la tabla
-    data = [['Título', 'Autor', 'Páginas', 'Publicado', 'Géneros']]
-    for book in books:
-        genres_text = ', '.join([g.name for g in book.genres.all()])
-        data.append([
-            (book.title[:50] + '...') if len(book.title) > 50 else book.title,
-            f"{book.author.first_name} {book.author.last_name}",
-            str(book.pages),
-            str(book.published_date),
-            (genres_text[:60] + '...') if len(genres_text) > 60 else genres_text,
-        ])
-
-    # Crear tabla con estilos
-    table = Table(data, colWidths=[2.6*inch, 1.8*inch, 0.8*inch, 1.0*inch, 2.0*inch])
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 12),
-        ('ALIGN', (2, 1), (2, -1), 'RIGHT'),
-        ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.whitesmoke, colors.lightgrey]),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-    ]))
+    data = [_HEADER_ROW]
+    data += rows
+
+    # Crear tabla con estilos. Con anchos y altos fijos (celdas de una línea ya recortadas)
+    # ReportLab no mide el contenido al dividir la tabla entre páginas, lo que con muchas
+    # filas crecía de forma cuadrática. La cabecera se repite en cada página
+    table = Table(
+        data,
+        colWidths=[2.6*inch, 1.8*inch, 0.8*inch, 1.0*inch, 2.0*inch],
+        rowHeights=[_ROW_HEIGHT] * len(data),
+        repeatRows=1,
+    )
+    table.setStyle(_TABLE_STYLE)
     return table
 
 
-def user_library_pdf(user, books, sign_document=True):
+def invalidate_pdf_cache():
     """
-    Genera PDF con ReportLab y firma opcional.
-    :param books: queryset de Book
-    :param sign_document: si True, intenta firmar el PDF generado
-    :param user: instancia de User
-    :return: HttpResponse con PDF generado
+    Invalida todos los PDF cacheados cambiando la versión incluida en sus claves.
+    Se llama desde las señales de los modelos y tras las actualizaciones en bloque.
     """
-    print(f"[pdf_services.user_library_pdf] Generando PDF para usuario id={user.id} "
-          f"{user.first_name} {user.last_name} con {books.count()} libro(s).")
+    cache.set(_PDF_CACHE_VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def _pdf_cache_key(name, books, *parts):
+    """
+    Construye la clave de caché de un PDF a partir de la consulta de libros.
+    :param name: nombre del reporte
+    :param books: queryset de Book que alimenta el reporte
+    :param parts: valores adicionales que distinguen el documento
+    :return: clave de caché, o None si la caché no es compartida o la consulta no se puede representar
+    """
+    # Con una caché local a cada proceso, los demás workers seguirían sirviendo PDF invalidados
+    if not getattr(settings, 'SHARED_CACHE', False):
+        return None
+    try:
+        query = str(books.query)
+    except EmptyResultSet:
+        return None
+    version = cache.get_or_set(_PDF_CACHE_VERSION_KEY, lambda: uuid.uuid4().hex, None)
+    digest = hashlib.blake2b(query.encode('utf-8'), digest_size=16).hexdigest()
+    return ':'.join(['pdf', name, *map(str, parts), digest, version])
+
 
+def _get_signer():
+    """
+    Devuelve el servicio de firma compartido por el proceso, creándolo la primera vez.
+    El certificado y la clave cargados quedan cacheados por el propio servicio.
+    :return: instancia de DigitalSignatureService
+    """
+    global _SIGNER
+    if _SIGNER is None:
+        with _SIGNER_LOCK:
+            if _SIGNER is None:
+                _SIGNER = DigitalSignatureService()
+    return _SIGNER
+
+
+def _render_pdf(elements, sign_reason, filename, sign_document=True, cache_key=None):
+    """
+    Construye el PDF con ReportLab, lo firma opcionalmente y crea la respuesta HTTP.
+    El PDF se envía por bloques desde el stream, sin copiarlo a un objeto bytes.
+    :param elements: lista de flowables de ReportLab que forman el documento
+    :param sign_reason: motivo de la firma digital
+    :param filename: nombre del archivo para Content-Disposition
+    :param sign_document: si True, intenta firmar el PDF generado
+    :param cache_key: clave opcional para guardar el PDF final en caché
+    :return: FileResponse con el PDF en línea
+    """
     # Generar PDF base
     buffer = BytesIO()
 
@@ -63,139 +186,126 @@ def user_library_pdf(user, books, sign_document=True):
         topMargin=0.5 * inch, bottomMargin=1.2 * inch,
         leftMargin=0.5 * inch, rightMargin=0.5 * inch
     )
-    elements = []
-
-    # Estilos personalizados
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle', parent=styles['Heading1'],
-        fontSize=18, spaceAfter=20, alignment=1, textColor=colors.darkblue
-    )
-    stats_style = ParagraphStyle(
-        'StatsStyle', parent=styles['Normal'],
-        fontSize=11, spaceAfter=15, backColor=colors.lightgrey,
-        borderPadding=8, alignment=1, textColor=colors.darkblue
-    )
-
-    # Título y estadísticas
-    title = Paragraph(f"Biblioteca de {user.first_name} {user.last_name}", title_style)
-    elements.append(title)
-
-    stats_text = f"<b>Total de libros:</b> {books.count()}<br/><b>Usuario:</b> {user.first_name} {user.last_name} ({user.email})"
-    elements.append(Paragraph(stats_text, stats_style))
-    elements.append(Spacer(1, 12))
-
-    # Tabla de libros
-    elements.append(_build_table_books(books))
-    elements.append(Spacer(1, 100))  # espacio visual para firma
 
     # Construir PDF
     doc.build(elements)
     pdf_bytes = buffer.getvalue()
-    buffer.close()
 
-    print(f"[pdf_services.user_library_pdf] PDF base generado: {len(pdf_bytes)} bytes")
+    logger.debug("[pdf_services] %s: PDF base generado: %d bytes", filename, len(pdf_bytes))
 
     # Verificar encabezado PDF
     if not pdf_bytes.startswith(b'%PDF-'):
-        print(f"[pdf_services.user_library_pdf] Atención: el PDF no inicia con %PDF-. Cabecera={pdf_bytes[:8]!r}")
+        logger.warning("[pdf_services] %s: el PDF no inicia con %%PDF-. Cabecera=%r", filename, pdf_bytes[:8])
 
-    # Para firmar el PDF
+    # Para firmar el PDF (se escribe directamente en un stream, sin copia intermedia)
+    signed_stream = None
     if sign_document:
-        print("[pdf_services.user_library_pdf] Intentando firmar el PDF...")
+        logger.debug("[pdf_services] %s: intentando firmar el PDF", filename)
         try:
-            signer = DigitalSignatureService()
-            signed_pdf = signer.sign_pdf(
+            signed_stream = _get_signer().sign_pdf(
                 pdf_bytes,
-                reason="Biblioteca Personal - Lista de libros",
+                reason=sign_reason,
                 location="Sistema de Gestión de Biblioteca",
-                add_visual_signature=True
+                add_visual_signature=True,
+                out_stream=BytesIO()
             )
-            print(f"[pdf_services.user_library_pdf] Resultado firma: {len(signed_pdf)} bytes")
-            if len(signed_pdf) > len(pdf_bytes):
-                print("[pdf_services.user_library_pdf] Firma aplicada. Reemplazando contenido.")
-                pdf_bytes = signed_pdf
-            else:
-                print("[pdf_services.user_library_pdf] Tamaño no cambió o firma no aplicada. Se usa PDF original.")
-        except Exception as e:
-            print(f"[pdf_services.user_library_pdf] Error al firmar: {e}")
-            traceback.print_exc()
-            print("[pdf_services.user_library_pdf] Se devuelve el PDF original sin firmar.")
-
-    # Preparar respuesta HTTP
-    response = HttpResponse(pdf_bytes, content_type='application/pdf')
-    filename = f"biblioteca_{user.first_name}_{user.last_name}.pdf"
-    response['Content-Disposition'] = f'inline; filename="{filename}"'
-    print(f"[pdf_services.user_library_pdf] Respuesta lista. Nombre archivo: {filename}, bytes={len(pdf_bytes)}")
-    return response
+            signed_size = signed_stream.getbuffer().nbytes if signed_stream is not None else 0
+            logger.debug("[pdf_services] %s: resultado firma: %d bytes", filename, signed_size)
+            if signed_size <= len(pdf_bytes):
+                logger.debug("[pdf_services] %s: tamaño no cambió o firma no aplicada. Se usa PDF original.", filename)
+                signed_stream = None
+        except Exception:
+            logger.exception("[pdf_services] %s: error al firmar. Se devuelve el PDF original sin firmar.", filename)
 
+    # Preparar respuesta HTTP: si hay PDF firmado, se descarta el buffer original
+    if signed_stream is not None:
+        buffer.close()
+        stream = signed_stream
+    else:
+        buffer.seek(0)
+        stream = buffer
 
-def books_report_pdf(books, sign_document=True):
+    if cache_key:
+        cache.set(cache_key, stream.getvalue(), PDF_CACHE_TTL)
+    return FileResponse(stream, content_type='application/pdf', filename=filename)
+
+
+def user_library_pdf(user, books, sign_document=True):
     """
-    Genera un reporte general de libros y firma opcionalmente.
+    Genera PDF con ReportLab y firma opcional.
     :param books: queryset de Book
     :param sign_document: si True, intenta firmar el PDF generado
+    :param user: instancia de User
     :return: HttpResponse con PDF generado
     """
-    print(f"[pdf_services.books_report_pdf] Generando reporte de {books.count()} libro(s).")
+    # Servir desde caché si los datos no cambiaron desde la última generación
+    filename = f"biblioteca_{user.first_name}_{user.last_name}.pdf"
+    cache_key = _pdf_cache_key('user_library', books, user.id, sign_document)
+    cached = cache.get(cache_key) if cache_key else None
+    if cached is not None:
+        return FileResponse(BytesIO(cached), content_type='application/pdf', filename=filename)
 
-    # Generar PDF base
-    buffer = BytesIO()
+    # Evaluar una sola vez: el total se obtiene sin consulta COUNT adicional
+    rows = _book_rows(books)
+    logger.debug("[pdf_services.user_library_pdf] Generando PDF para usuario id=%s %s %s con %d libro(s).",
+                 user.id, user.first_name, user.last_name, len(rows))
 
-    # Configurar documento
-    doc = SimpleDocTemplate(
-        buffer, pagesize=A4,
-        topMargin=0.5 * inch, bottomMargin=1.2 * inch,
-        leftMargin=0.5 * inch, rightMargin=0.5 * inch
+    # Estadísticas en celdas de texto plano: no se interpreta marcado en los datos del usuario
+    stats = Table(
+        [
+            ['Total de libros:', str(len(rows))],
+            ['Usuario:', f"{user.first_name} {user.last_name} ({user.email})"],
+        ],
+        colWidths=[1.5 * inch, 4.5 * inch],
     )
-    elements = []
+    stats.setStyle(_STATS_TABLE_STYLE)
 
-    # Estilos personalizados
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle', parent=styles['Heading1'],
-        fontSize=18, spaceAfter=20, alignment=1, textColor=colors.darkblue
+    # Título, estadísticas y tabla de libros
+    elements = [
+        Paragraph(f"Biblioteca de {user.first_name} {user.last_name}", _TITLE_STYLE),
+        stats,
+        Spacer(1, 12),
+        _build_table_books(rows),
+        Spacer(1, 100),  # espacio visual para firma
+    ]
+
+    return _render_pdf(
+        elements,
+        sign_reason="Biblioteca Personal - Lista de libros",
+        filename=filename,
+        sign_document=sign_document,
+        cache_key=cache_key,
     )
-    elements.append(Paragraph("Reporte de Libros", title_style))
-    elements.append(_build_table_books(books))
-    elements.append(Spacer(1, 100))
 
-    # Construir PDF
-    doc.build(elements)
-    pdf_bytes = buffer.getvalue()
-    buffer.close()
 
-    print(f"[pdf_services.books_report_pdf] PDF base generado: {len(pdf_bytes)} bytes")
+def books_report_pdf(books, sign_document=True):
+    """
+    Genera un reporte general de libros y firma opcionalmente.
+    :param books: queryset de Book
+    :param sign_document: si True, intenta firmar el PDF generado
+    :return: HttpResponse con PDF generado
+    """
+    # Servir desde caché si los datos no cambiaron desde la última generación
+    cache_key = _pdf_cache_key('books_report', books, sign_document)
+    cached = cache.get(cache_key) if cache_key else None
+    if cached is not None:
+        return FileResponse(BytesIO(cached), content_type='application/pdf', filename='reporte_libros.pdf')
 
-    # Verificar encabezado PDF
-    if not pdf_bytes.startswith(b'%PDF-'):
-        print(f"[pdf_services.books_report_pdf] Atención: el PDF no inicia con %PDF-. Cabecera={pdf_bytes[:8]!r}")
+    # Evaluar una sola vez: el total se obtiene sin consulta COUNT adicional
+    rows = _book_rows(books)
+    logger.debug("[pdf_services.books_report_pdf] Generando reporte de %d libro(s).", len(rows))
 
+    # Título y tabla de libros
+    elements = [
+        Paragraph("Reporte de Libros", _TITLE_STYLE),
+        _build_table_books(rows),
+        Spacer(1, 100),
+    ]
 
-    # Para firmar el PDF
-    if sign_document:
-        print("[pdf_services.books_report_pdf] Intentando firmar el PDF...")
-        try:
-            signer = DigitalSignatureService()
-            signed_pdf = signer.sign_pdf(
-                pdf_bytes,
-                reason="Reporte general de libros",
-                location="Sistema de Gestión de Biblioteca",
-                add_visual_signature=True
-            )
-            print(f"[pdf_services.books_report_pdf] Resultado firma: {len(signed_pdf)} bytes")
-            if len(signed_pdf) > len(pdf_bytes):
-                print("[pdf_services.books_report_pdf] Firma aplicada. Reemplazando contenido.")
-                pdf_bytes = signed_pdf
-            else:
-                print("[pdf_services.books_report_pdf] Tamaño no cambió o firma no aplicada. Se usa PDF original.")
-        except Exception as e:
-            print(f"[pdf_services.books_report_pdf] Error al firmar: {e}")
-            traceback.print_exc()
-            print("[pdf_services.books_report_pdf] Se devuelve el PDF original sin firmar.")
-
-    # Preparar respuesta HTTP
-    response = HttpResponse(pdf_bytes, content_type='application/pdf')
-    response['Content-Disposition'] = 'inline; filename="reporte_libros.pdf"'
-    print(f"[pdf_services.books_report_pdf] Respuesta lista. bytes={len(pdf_bytes)}")
-    return response
\ No newline at end of file
+    return _render_pdf(
+        elements,
+        sign_reason="Reporte general de libros",
+        filename='reporte_libros.pdf',
+        sign_document=sign_document,
+        cache_key=cache_key,
+    )
@@ -0,0 +1,54 @@
+from django.contrib.auth.models import Group, Permission, User as AuthUser
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from migrationsdb.backends import invalidate_perms_cache
+from migrationsdb.models import User, Author, Genre, Book
+from migrationsdb.services.groups import invalidate_groups_cache
+from migrationsdb.services.pdf_services import invalidate_pdf_cache
+
+
+@receiver([post_save, post_delete], sender=User)
+@receiver([post_save, post_delete], sender=Author)
+@receiver([post_save, post_delete], sender=Genre)
+@receiver([post_save, post_delete], sender=Book)
+def invalidate_pdfs_on_change(sender, **kwargs):
+    """Invalida los PDF cacheados cuando cambian los datos que muestran"""
+    invalidate_pdf_cache()
+
+
+@receiver(m2m_changed, sender=Book.genres.through)
+def invalidate_pdfs_on_genres_change(sender, action, **kwargs):
+    """Invalida los PDF cacheados cuando cambian los géneros de un libro"""
+    if action.startswith('post_'):
+        invalidate_pdf_cache()
+
+
+@receiver([post_save, post_delete], sender=Group)
+def invalidate_groups_on_change(sender, **kwargs):
+    """Invalida la lista de grupos cacheada; dentro de una transacción, al confirmarla"""
+    transaction.on_commit(invalidate_groups_cache)
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def invalidate_groups_on_permissions_change(sender, action, **kwargs):
+    """Invalida la lista de grupos cacheada (incluye el número de permisos) al cambiar sus permisos"""
+    if action.startswith('post_'):
+        transaction.on_commit(invalidate_groups_cache)
+
+
+@receiver(m2m_changed, sender=AuthUser.groups.through)
+@receiver(m2m_changed, sender=AuthUser.user_permissions.through)
+@receiver(m2m_changed, sender=Group.permissions.through)
+def invalidate_perms_on_m2m_change(sender, action, **kwargs):
+    """Invalida los permisos cacheados cuando cambian los grupos o permisos asignados"""
+    if action.startswith('post_'):
+        transaction.on_commit(invalidate_perms_cache)
+
+
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=Permission)
+def invalidate_perms_on_delete(sender, **kwargs):
+    """Invalida los permisos cacheados al borrar un grupo o permiso (sus relaciones se borran en cascada)"""
+    transaction.on_commit(invalidate_perms_cache)
@@ -1,3 +1,40 @@
-from django.test import TestCase
+from django.contrib.auth.models import Group, Permission, User as AuthUser
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 
-# Create your tests here.
+from migrationsdb.services.groups import setup_initial_groups
+
+
+@override_settings(AUTHENTICATION_BACKENDS=['migrationsdb.backends.CachedModelBackend'])
+class CachedModelBackendTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            setup_initial_groups()
+        self.group = Group.objects.get(name='Lectores')
+        self.user = AuthUser.objects.create_user('lector', 'lector@example.com', 'secret')
+        self.user.groups.add(self.group)
+
+    def _fresh_user(self):
+        # Instancia nueva: sin la caché de permisos de la petición (_perm_cache)
+        return AuthUser.objects.get(pk=self.user.pk)
+
+    def test_permissions_are_served_from_cache(self):
+        self.assertTrue(self._fresh_user().has_perm('migrationsdb.view_book'))
+        user = self._fresh_user()
+        with self.assertNumQueries(0):
+            self.assertTrue(user.has_perm('migrationsdb.view_book'))
+
+    def test_setup_initial_groups_revokes_cached_permissions(self):
+        delete_book = Permission.objects.get(content_type__app_label='migrationsdb', codename='delete_book')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.group.permissions.add(delete_book)
+        self.assertTrue(self._fresh_user().has_perm('migrationsdb.delete_book'))
+
+        # setup_initial_groups quita el permiso con un borrado directo, sin m2m_changed
+        with self.captureOnCommitCallbacks(execute=True):
+            setup_initial_groups()
+
+        self.assertFalse(self._fresh_user().has_perm('migrationsdb.delete_book'))
+        self.assertTrue(self._fresh_user().has_perm('migrationsdb.view_book'))
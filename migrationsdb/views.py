@@ -1,40 +1,89 @@
+import logging
+
 from django.contrib.auth.decorators import login_required, permission_required, user_passes_test
 from django.http import HttpResponse, JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
+from django.core.paginator import Paginator
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
+from rest_framework.exceptions import ValidationError
 from rest_framework.utils import json
 
-from decorators import library_management_required, library_access_required
+from decorators import library_management_required, library_access_required, user_group_names
 from migrationsdb.forms import UserForm, AuthorForm, GenreForm, BookForm
-from migrationsdb.models import User, Author, Genre, Book
+from migrationsdb.models import User, Author, Genre, Book, GENRE_NAMES_PREFETCH
 from migrationsdb.serializers import GenreSerializer
 from migrationsdb.services import pdf_services
+from migrationsdb.services.groups import get_all_groups, setup_initial_groups
+from migrationsdb.services.import_service import import_books_bulk
 
 from django.db import transaction
-from datetime import date
+from django.db.models import Count, Prefetch, Q
 
 from migrationsdb.services.openlibrary_service import search_books as ol_search, get_book_by_isbn as ol_get_by_isbn
 
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.models import User as AuthUser, Group, Permission
 
+logger = logging.getLogger(__name__)
+
+LIST_PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+
+
+def _paginate(request, queryset, per_page=LIST_PAGE_SIZE, count=None):
+    """
+    Devuelve la página solicitada del queryset (parámetro GET 'page').
+    El tamaño de página puede ajustarse con el parámetro GET 'page_size' (hasta MAX_PAGE_SIZE).
+    :param request: El objeto HttpRequest de Django.
+    :param queryset: QuerySet ordenado a paginar.
+    :param per_page: Tamaño de página por defecto.
+    :param count: Total de objetos si ya se conoce; evita el COUNT del paginador.
+    :return: Page de Django con los objetos de la página.
+    """
+    try:
+        per_page = max(1, min(MAX_PAGE_SIZE, int(request.GET.get('page_size', per_page))))
+    except (TypeError, ValueError):
+        pass
+    paginator = Paginator(queryset, per_page)
+    if count is not None:
+        paginator.count = count
+    return paginator.get_page(request.GET.get('page'))
+
 
 @login_required
 def home(request):
     """
     Muestra la página principal con la lista de todos los usuarios ordenados por fecha de creación.
     """
-    users = User.objects.select_related('auth_user').prefetch_related('auth_user__groups').all().order_by('last_name', 'first_name')
+    # Solo las columnas que muestra la plantilla; el número de libros se cuenta en la misma consulta
+    users = User.objects.select_related('auth_user').prefetch_related(
+        Prefetch('auth_user__groups', queryset=Group.objects.only('id', 'name'))
+    ).annotate(book_count=Count('books')).only(
+        'id', 'first_name', 'last_name', 'email', 'age', 'auth_user__id'
+    ).order_by('last_name', 'first_name')
+
+    # Contexto adicional para administradores (solo se muestra a superusuarios):
+    # el total para el paginador y los usuarios con acceso en una sola consulta
+    total = auth_count = None
+    if request.user.is_superuser:
+        stats = User.objects.aggregate(
+            total=Count('id'),
+            auth_count=Count('id', filter=Q(auth_user__isnull=False)),
+        )
+        total, auth_count = stats['total'], stats['auth_count']
 
-    # Contexto adicional para administradores
-    auth_count = users.filter(auth_user__isnull=False).count()
+    page = _paginate(request, users, count=total)
+
+    # Grupos del usuario actual (cacheados durante la petición)
+    group_names = user_group_names(request.user)
     context = {
-        'users': users,
+        'users': page,
+        'page_obj': page,
         'auth_count': auth_count,
-        'is_admin': request.user.is_superuser or request.user.groups.filter(name='Administradores').exists(),
-        'is_librarian': request.user.groups.filter(name__in=['Administradores', 'Bibliotecarios']).exists(),
+        'is_admin': request.user.is_superuser or 'Administradores' in group_names,
+        'is_librarian': bool(group_names & {'Administradores', 'Bibliotecarios'}),
     }
 
     return render(request, 'migrationsdb/home.html', context)
@@ -96,6 +145,7 @@ def update_user(request, user_id):
         form = UserForm(instance=user)
     return render(request, 'migrationsdb/user_form.html', {'form': form, 'user': user})
 
+@require_http_methods(["POST"])
 @login_required
 @permission_required('migrationsdb.delete_user', raise_exception=True)
 def delete_user(request, user_id):
@@ -118,8 +168,8 @@ def list_authors(request):
     :param request: El objeto HttpRequest de Django.
     :return: HttpResponse con el template authors_list.html y la lista de autores.
     """
-    authors = Author.objects.all().order_by('last_name', 'first_name')
-    return render(request, 'migrationsdb/authors_list.html', {'authors': authors})
+    page = _paginate(request, Author.objects.annotate(book_count=Count('books')).order_by('last_name', 'first_name'))
+    return render(request, 'migrationsdb/authors_list.html', {'authors': page, 'page_obj': page})
 
 @login_required
 @permission_required('migrationsdb.add_book', raise_exception=True)
@@ -162,6 +212,7 @@ def update_author(request, author_id):
     return render(request, 'migrationsdb/author_form.html', {'form': form, 'author': author})
 
 
+@require_http_methods(["POST"])
 @login_required
 @permission_required('migrationsdb.delete_book', raise_exception=True)
 def delete_author(request, author_id):
@@ -182,8 +233,12 @@ def list_genres(request):
     :param request: El objeto HttpRequest de Django.
     :return: HttpResponse con el template genres_list.html y la lista de géneros.
     """
-    genres = Genre.objects.all().order_by('name')
-    return render(request, 'migrationsdb/genres_list.html', {'genres': genres})
+    page = _paginate(request, Genre.objects.all().order_by('name'))
+    return render(request, 'migrationsdb/genres_list.html', {
+        'genres': page,
+        'page_obj': page,
+        'total_genres': page.paginator.count,
+    })
 
 def create_genre(request):
     """
@@ -223,6 +278,7 @@ def update_genre(request, genre_id):
     form = GenreForm(instance=genre)
     return render(request, 'migrationsdb/genre_form.html', {'form': form, 'genre': genre})
 
+@require_http_methods(["POST"])
 def delete_genre(request, genre_id):
     """
     Elimina un género específico de la base de datos y redirige a la lista de géneros.
@@ -243,8 +299,14 @@ def list_book(request):
     :param request: El objeto HttpRequest de Django.
     :return: HttpResponse con el template books_list.html y la lista de libros.
     """
-    books = Book.objects.select_related('author', 'owner').prefetch_related('genres').order_by('title')
-    return render(request, 'migrationsdb/books_list.html', {'books': books})
+    # Del autor y el propietario solo se muestran los nombres
+    books = Book.objects.with_related().only(
+        'id', 'title', 'isbn', 'pages', 'published_date', 'created_at',
+        'author__first_name', 'author__last_name',
+        'owner__first_name', 'owner__last_name',
+    ).order_by('title')
+    page = _paginate(request, books)
+    return render(request, 'migrationsdb/books_list.html', {'books': page, 'page_obj': page})
 
 @login_required
 @permission_required('migrationsdb.add_book', raise_exception=True)
@@ -289,6 +351,7 @@ def update_book(request, book_id):
     return render(request, 'migrationsdb/book_form.html', {'form': form, 'book': book})
 
 
+@require_http_methods(["POST"])
 @login_required
 @permission_required('migrationsdb.delete_book', raise_exception=True)
 def delete_book(request, book_id):
@@ -313,7 +376,20 @@ def user_library(request, user_id):
     :return: HttpResponse con el template user_library.html y la lista de libros del usuario.
     """
     user = get_object_or_404(User, id=user_id)
-    books = Book.objects.filter(owner=user).select_related('author').prefetch_related('genres').order_by('title')
+
+    # Listado de solo lectura: diccionarios con las columnas mostradas, sin instanciar modelos
+    books = list(Book.objects.filter(owner=user).order_by('title').values(
+        'id', 'title', 'pages', 'published_date', 'author__first_name', 'author__last_name'
+    ))
+
+    # Nombres de géneros agrupados por libro en una sola consulta
+    genre_names = {}
+    links = Book.genres.through.objects.filter(book__owner=user).values_list('book_id', 'genre__name')
+    for book_id, name in links:
+        genre_names.setdefault(book_id, []).append(name)
+    for book in books:
+        book['genres'] = genre_names.get(book['id'], [])
+
     return render(request, 'migrationsdb/user_library.html', {'user': user, 'books': books})
 
 
@@ -328,22 +404,32 @@ def add_books_to_library(request, user_id):
     """
     user = get_object_or_404(User, id=user_id)
     # Solo mostrar libros que NO tienen propietario
-    available_books = Book.objects.filter(owner=None).select_related('author').prefetch_related('genres')
+    available_books = Book.objects.filter(owner=None).select_related('author').prefetch_related(GENRE_NAMES_PREFETCH).only(
+        'id', 'title', 'isbn', 'pages', 'author__first_name', 'author__last_name'
+    )
 
     if request.method == 'POST':
-        selected_books = request.POST.getlist('books')
-        books_added = 0
-        books_not_available = []
-
-        for book_id in selected_books:
-            book = get_object_or_404(Book, id=book_id)
-            # Verificar que el libro sigue disponible antes de asignarlo
-            if book.owner is None:
-                book.owner = user
-                book.save()
-                books_added += 1
-            else:
-                books_not_available.append(book.title)
+        book_ids = [int(book_id) for book_id in request.POST.getlist('books') if book_id.isdigit()]
+
+        with transaction.atomic():
+            # Reservar los libros disponibles; los bloqueados por otra petición se omiten
+            claimed_ids = list(
+                Book.objects.select_for_update(skip_locked=True)
+                .filter(id__in=book_ids, owner__isnull=True)
+                .values_list('id', flat=True)
+            )
+            # Asignar en una sola consulta los libros reservados
+            books_added = Book.objects.filter(id__in=claimed_ids, owner__isnull=True).update(owner=user)
+
+            # El resto de los seleccionados ya no está disponible
+            unavailable_ids = set(book_ids) - set(claimed_ids)
+            books_not_available = list(
+                Book.objects.filter(id__in=unavailable_ids).values_list('title', flat=True)
+            ) if unavailable_ids else []
+
+        # update() no emite señales: invalidar los PDF cacheados manualmente
+        if books_added:
+            pdf_services.invalidate_pdf_cache()
 
         # Mensajes informativos
         if books_added > 0:
@@ -369,15 +455,19 @@ def remove_books_from_library(request, user_id):
     :return: HttpResponse con el formulario para quitar libros o redirección a la biblioteca del usuario tras éxito.
     """
     user = get_object_or_404(User, id=user_id)
-    user_books = Book.objects.filter(owner=user)
+    user_books = Book.objects.filter(owner=user).select_related('author').prefetch_related(GENRE_NAMES_PREFETCH).only(
+        'id', 'title', 'isbn', 'pages', 'author__first_name', 'author__last_name'
+    ).order_by('title')
 
     if request.method == 'POST':
-        selected_books = request.POST.getlist('books')
-        for book_id in selected_books:
-            book = get_object_or_404(Book, id=book_id, owner=user)
-            book.owner = None  # Quitar propietario
-            book.save()
-        messages.success(request, f'Libros removidos de la biblioteca de {user.first_name}.')
+        book_ids = [int(book_id) for book_id in request.POST.getlist('books') if book_id.isdigit()]
+
+        # Quitar propietario en una sola consulta, solo a libros de este usuario
+        books_removed = Book.objects.filter(id__in=book_ids, owner=user).update(owner=None)
+        if books_removed:
+            # update() no emite señales: invalidar los PDF cacheados manualmente
+            pdf_services.invalidate_pdf_cache()
+        messages.success(request, f'{books_removed} libro(s) removido(s) de la biblioteca de {user.first_name}.')
         return redirect('user_library', user_id=user.id)
 
     return render(request, 'migrationsdb/remove_books_from_library.html', {
@@ -394,7 +484,7 @@ def user_library_pdf(request, user_id):
     :return: HttpResponse con el PDF generado o redirección a la biblioteca del usuario con mensaje de error.
     :technology: Utiliza xhtml2pdf para convertir una plantilla HTML en PDF.
     """
-    print(f"[views.user_library_pdf] Solicitud PDF para user_id={user_id}")
+    logger.debug("[views.user_library_pdf] Solicitud PDF para user_id=%s", user_id)
     user = get_object_or_404(User, id=user_id)
     books = user.books.select_related('author').prefetch_related('genres')
     if not books.exists():
@@ -412,7 +502,7 @@ def books_report_pdf(request):
     :param request: El objeto HttpRequest de Django.
     :return: HttpResponse con el PDF generado.
     """
-    books = Book.objects.select_related('author', 'owner').prefetch_related('genres')
+    books = Book.objects.with_related()
     return pdf_services.books_report_pdf(books)
 
 def search_external_books(request):
@@ -457,22 +547,6 @@ def search_external_books(request):
     }
     return render(request, 'migrationsdb/book_search.html', ctx)
 
-def _split_author(full_name: str):
-    """
-    Divide un nombre completo en (last_name, first_name) simple.
-    Si solo hay un nombre, last_name es ese nombre y first_name es vacío.
-    Si está vacío, devuelve ("Desconocido", "Autor").
-    :param full_name: Nombre completo del autor.
-    :return: Tupla (last_name, first_name)
-    """
-    parts = (full_name or "").strip().split()
-    if not parts:
-        return "Desconocido", "Autor"
-    if len(parts) == 1:
-        return parts[0], ""
-    return parts[-1], " ".join(parts[:-1])
-
-
 @transaction.atomic
 def import_external_book(request, isbn: str):
     """
@@ -510,53 +584,6 @@ def import_external_book(request, isbn: str):
                 messages.error(request, "Libro no encontrado en Open Library.")
                 return redirect('search_external_books')
 
-        # Usar título + primer autor como identificador alternativo si no hay ISBN
-        isbn_clean = str(book["isbn"])[:13] if book.get("isbn") else None
-        title_clean = (book["title"] or "Sin título")[:200]
-
-        # Verificar duplicados por ISBN o por título+autor
-        existing = None
-        if isbn_clean:
-            existing = Book.objects.filter(isbn=isbn_clean).first()
-
-        if not existing:
-            author_name = (book["authors"][0] if book["authors"] else "Autor Desconocido").strip()
-            existing = Book.objects.filter(
-                title__iexact=title_clean,
-                author__first_name__icontains=author_name.split()[-1] if author_name else ""
-            ).first()
-
-        if existing:
-            messages.info(request, f"El libro '{existing.title}' ya existe en el sistema.")
-            owner_id = request.GET.get("owner_id")
-            if owner_id:
-                return redirect('user_library', user_id=owner_id)
-            return redirect('list_book')
-
-        # Crear/obtener autor
-        author_name = (book["authors"][0] if book["authors"] else "Autor Desconocido").strip()
-        ln, fn = _split_author(author_name)
-        author, _ = Author.objects.get_or_create(
-            first_name=fn or "N/A",
-            last_name=ln or "N/A",
-            defaults={
-                "birth_date": date(1900, 1, 1),
-                "nationality": "N/D",
-            }
-        )
-
-        # Crear géneros
-        genres = []
-        for s in (book.get("subjects") or [])[:5]:
-            name = str(s)[:50]
-            g, _ = Genre.objects.get_or_create(name=name, defaults={"description": ""})
-            genres.append(g)
-
-        # Fecha y páginas
-        year = book.get("year")
-        pub_date = date(int(year), 1, 1) if isinstance(year, int) and 1 <= year <= 9999 else date(1900, 1, 1)
-        pages = int(book["pages"]) if str(book.get("pages", "")).isdigit() else 100
-
         # Obtener owner si se especifica
         owner = None
         owner_id = request.GET.get("owner_id")
@@ -566,19 +593,14 @@ def import_external_book(request, isbn: str):
             except Exception:
                 owner = None
 
-        # Crear libro
-        new_book = Book(
-            title=title_clean,
-            author=author,
-            owner=owner,
-            published_date=pub_date,
-            isbn=isbn_clean,
-            pages=pages,
-        )
+        # Crear el libro (con autor y géneros) salvo que ya exista por ISBN o título+autor
+        [(new_book, created)] = import_books_bulk([book], owner=owner)
 
-        new_book.save()
-        if genres:
-            new_book.genres.set(genres)
+        if not created:
+            messages.info(request, f"El libro '{new_book.title}' ya existe en el sistema.")
+            if owner_id:
+                return redirect('user_library', user_id=owner_id)
+            return redirect('list_book')
 
         messages.success(request, f"Libro importado: {new_book.title}")
         if owner:
@@ -686,12 +708,14 @@ def setup_groups(request):
 
         return redirect('setup_groups')
 
-    # Obtener información de grupos existentes
-    groups = Group.objects.prefetch_related('permissions').all()
+    # Obtener grupos existentes con solo el nombre de sus permisos (se muestran como etiquetas)
+    groups = list(Group.objects.order_by('name').prefetch_related(
+        Prefetch('permissions', queryset=Permission.objects.only('id', 'name'))
+    ))
 
     context = {
         'groups': groups,
-        'total_groups': groups.count(),
+        'total_groups': len(groups),
     }
 
     return render(request, 'migrationsdb/setup_groups.html', context)
@@ -703,39 +727,17 @@ def setup_default_groups():
     Usada por la vista setup_groups.
     :return: Lista de nombres de grupos que fueron creados.
     """
-    from django.core.management import call_command
-    from io import StringIO
-    import sys
-
-    # Capturar la salida del comando
-    old_stdout = sys.stdout
-    sys.stdout = captured_output = StringIO()
-
-    try:
-        call_command('setup_initial_groups')
-        output = captured_output.getvalue()
-
-        # Extraer los grupos creados del output
-        created_groups = []
-        for line in output.split('\n'):
-            if '✓ Grupo' in line and 'creado' in line:
-                group_name = line.split('"')[1]
-                created_groups.append(group_name)
-
-        return created_groups
+    return setup_initial_groups()
 
-    finally:
-        sys.stdout = old_stdout
 
-
-@user_passes_test(lambda u: u.is_superuser or u.groups.filter(name='Administradores').exists())
+@user_passes_test(lambda u: u.is_superuser or 'Administradores' in user_group_names(u))
 def manage_user_permissions(request, user_id):
     """
     Vista para que administradores gestionen permisos de usuarios.
     """
     # Obtener el usuario de biblioteca primero
     try:
-        library_user = get_object_or_404(User, id=user_id)
+        library_user = get_object_or_404(User.objects.select_related('auth_user'), id=user_id)
 
         # Verificar si tiene usuario de autenticación asociado
         if not library_user.auth_user:
@@ -750,21 +752,16 @@ def manage_user_permissions(request, user_id):
 
     if request.method == 'POST':
         # Procesar cambios de grupos
-        selected_groups = request.POST.getlist('groups')
-        auth_user.groups.clear()
+        group_ids = [int(group_id) for group_id in request.POST.getlist('groups') if group_id.isdigit()]
 
-        for group_id in selected_groups:
-            try:
-                group = Group.objects.get(id=group_id)
-                auth_user.groups.add(group)
-            except Group.DoesNotExist:
-                pass
+        # Aplicar solo la diferencia con los grupos actuales (los IDs inexistentes se ignoran)
+        auth_user.groups.set(Group.objects.filter(id__in=group_ids))
 
         messages.success(request, f'Permisos actualizados para {auth_user.get_full_name() or auth_user.username}')
         return redirect('manage_user_permissions', user_id=user_id)
 
-    # Obtener todos los grupos disponibles
-    all_groups = Group.objects.all().order_by('name')
+    # Obtener todos los grupos disponibles (cacheados)
+    all_groups = get_all_groups()
     user_groups = auth_user.groups.all()
 
     context = {
@@ -790,7 +787,14 @@ def update_genre_api(request, genre_id):
         serializer = GenreSerializer(genre, data=request.POST, partial=True)
 
         if serializer.is_valid():
-            serializer.save()
+            try:
+                serializer.save()
+            except ValidationError as e:
+                # Nombre duplicado detectado por la restricción UNIQUE
+                return JsonResponse({
+                    'success': False,
+                    'errors': e.detail
+                })
             return JsonResponse({
                 'success': True,
                 'message': f'Género "{serializer.data["name"]}" actualizado correctamente',
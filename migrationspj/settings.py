@@ -67,6 +67,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'migrationsdb.context_processors.user_groups',
             ],
         },
     },
@@ -82,9 +83,27 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Reutilizar la conexión entre peticiones (segundos) en lugar de abrir una por petición
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '60')),
     }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+
+# LocMemCache (por defecto) es local a cada proceso: con varios workers, las invalidaciones
+# hechas en uno no llegan a los demás. Para cachear datos que se invalidan (p. ej. los PDF)
+# hay que configurar un backend compartido, p. ej.:
+#   CACHE_BACKEND=django.core.cache.backends.memcached.PyMemcacheCache CACHE_LOCATION=127.0.0.1:11211
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache')
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+SHARED_CACHE = CACHE_BACKEND != 'django.core.cache.backends.locmem.LocMemCache'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -140,6 +159,12 @@ LOGIN_URL = '/login/'
 LOGIN_REDIRECT_URL = '/'
 LOGOUT_REDIRECT_URL = '/login/'
 
+# ModelBackend con los permisos de cada usuario cacheados entre peticiones (ver migrationsdb.backends).
+# Solo con una caché compartida: con LocMemCache los demás procesos no verían las revocaciones
+AUTHENTICATION_BACKENDS = [
+    'migrationsdb.backends.CachedModelBackend' if SHARED_CACHE else 'django.contrib.auth.backends.ModelBackend',
+]
+
 # Para manejar excepciones de permisos
 PERMISSION_DENIED_URL = '/login/'
 